@@ -0,0 +1,34 @@
+# commands.py
+import os
+import importlib.util
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+# Sub-command name -> (script file, description). Every script exposes run(vm);
+# the read-only ones also expose collect(vm) -> (headers, rows).
+COMMANDS = {
+    "get-device": ("get-device.py", "device inventory"),
+    "control-status": ("control_status.py", "control connections and OMP peers per device"),
+    "get-policy-group": ("get-policy-group.py", "policy groups and associated devices"),
+    "device-health": ("monitor_device_health.py", "device state and uptime"),
+    "show-data-prefix": ("show-data-prefix.py", "browse security-data-ip-prefix objects"),
+    "update-data-prefix": ("update-data-prefix.py", "add/delete prefixes on an object"),
+    "push-data-prefix": ("push-data-prefix.py", "push the PCI /16 expansion"),
+    "show-ngfw": ("show-ngfw.py", "NGFW rules of an embedded-security policy"),
+    "show-aar": ("show-aar.py", "parcels of an application-priority policy"),
+}
+
+READ_COMMANDS = ["get-device", "control-status", "get-policy-group", "device-health"]
+
+_loaded = {}
+
+
+def load_command(name):
+    """Import a script by sub-command name (file names contain dashes). Cached."""
+    if name not in _loaded:
+        path = os.path.join(HERE, COMMANDS[name][0])
+        spec = importlib.util.spec_from_file_location(name.replace("-", "_"), path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _loaded[name] = module
+    return _loaded[name]
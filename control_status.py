@@ -1,65 +1,88 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
+from inventory_stats import GROUP_FIELDS, InventoryAggregator, device_items
+import argparse
 import sys
 import tabulate
 
-def main():
-    if len(sys.argv) >= 4:
-        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
-    else:
-        host, user, pwd = load_vmanage_creds()
+HEADERS = [
+    "Host-Name",
+    "System IP",
+    "Reachability",
+    "Ctrl Conn",
+    "OMP Peers",
+    "Device Type",
+    "Version",
+    "Model",
+]
 
-    vm = VManage(host, user, pwd)
+def device_row(d):
+    hostname    = d.get("host-name", "")
+    system_ip   = d.get("system-ip", "")
+    # different versions use 'reachability' or 'status'
+    reach       = d.get("reachability", d.get("status", ""))
+    ctrl_conn   = d.get("controlConnections", d.get("controlConnectionsUp", ""))
+    omp_peers   = d.get("ompPeers", d.get("ompPeersUp", ""))
+    device_type = d.get("device-type", "")
+    version     = d.get("version", "")
+    model       = d.get("device-model", "")
 
+    return [
+        hostname,
+        system_ip,
+        reach,
+        ctrl_conn,
+        omp_peers,
+        device_type,
+        version,
+        model,
+    ]
+
+def collect(vm):
+    """Return (headers, rows) with control-plane status per device."""
     # Inventory – this is known to work in your environment
-    resp = vm.get("/device")
+    devices = device_items(vm.get("/device"))
+    return HEADERS, [device_row(d) for d in devices]
 
-    # Normalise into a list
-    if isinstance(resp, dict) and "data" in resp:
-        devices = resp["data"]
-    elif isinstance(resp, list):
-        devices = resp
-    else:
-        print("Unexpected /device response format:")
-        print(resp)
+def summarize(vm, group_by, top=20, drill=None):
+    """Return (headers, rows, drill_rows) grouped by site/model/version/reachability."""
+    agg = InventoryAggregator(group_by, drill=drill, row=device_row)
+    headers, rows = agg.consume(device_items(vm.get("/device"))).summary(top)
+    return headers, rows, agg.drill_rows
+
+def run(vm, group_by=None, top=20, drill=None):
+    """Print control-plane status for every device, or a grouped summary if group_by is set."""
+    try:
+        if group_by:
+            headers, table, drill_rows = summarize(vm, group_by, top, drill)
+        else:
+            headers, table = collect(vm)
+    except ValueError as e:
+        print(e)
         sys.exit(1)
 
-    headers = [
-        "Host-Name",
-        "System IP",
-        "Reachability",
-        "Ctrl Conn",
-        "OMP Peers",
-        "Device Type",
-        "Version",
-        "Model",
-    ]
-    table = []
+    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+    if group_by and drill is not None:
+        print(f"\n=== Devices with {group_by} = {drill} ({len(drill_rows)}) ===")
+        print(tabulate.tabulate(drill_rows, HEADERS, tablefmt="fancy_grid"))
 
-    for d in devices:
-        hostname    = d.get("host-name", "")
-        system_ip   = d.get("system-ip", "")
-        # different versions use 'reachability' or 'status'
-        reach       = d.get("reachability", d.get("status", ""))
-        ctrl_conn   = d.get("controlConnections", d.get("controlConnectionsUp", ""))
-        omp_peers   = d.get("ompPeers", d.get("ompPeersUp", ""))
-        device_type = d.get("device-type", "")
-        version     = d.get("version", "")
-        model       = d.get("device-model", "")
 
-        row = [
-            hostname,
-            system_ip,
-            reach,
-            ctrl_conn,
-            omp_peers,
-            device_type,
-            version,
-            model,
-        ]
-        table.append(row)
+def main():
+    parser = argparse.ArgumentParser(description="Show control-plane status per device.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--group-by", choices=list(GROUP_FIELDS),
+                        help="print counts, versions, models and outliers per group instead of one row per device")
+    parser.add_argument("--top", type=int, default=20, help="with --group-by, largest groups to show (default: %(default)s)")
+    parser.add_argument("--drill", metavar="VALUE", help="with --group-by, also list the devices of this group")
+    args = parser.parse_args()
 
-    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+
+    vm = VManage(host, user, pwd)
+    run(vm, args.group_by, args.top, args.drill)
 
 
 if __name__ == "__main__":
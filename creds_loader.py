@@ -1,17 +1,14 @@
 # creds_loader.py
 import os
 import subprocess
-import yaml
 
-VAULT_FILE = os.path.expanduser("~/scripts/cisco-sdwan/vmanage_creds.yml")
+VAULT_FILE = os.path.expanduser(os.environ.get("VMANAGE_VAULT_FILE", "~/scripts/cisco-sdwan/vmanage_creds.yml"))
 VAULT_PASS_FILE = os.path.expanduser("~/.ansible_vault_pass.txt")
 
 
-def load_vmanage_creds():
-    """
-    Decrypt vmanage_creds.yml using ansible-vault and return (url, username, password).
-    """
-    cmd = ["ansible-vault", "view", VAULT_FILE]
+def _read_vault(vault_file=VAULT_FILE):
+    """Decrypt the vault file with ansible-vault and return the parsed YAML."""
+    cmd = ["ansible-vault", "view", vault_file]
 
     # If a vault password file exists, use it automatically
     if os.path.isfile(VAULT_PASS_FILE):
@@ -25,11 +22,49 @@ def load_vmanage_creds():
         check=True,
     )
 
-    data = yaml.safe_load(result.stdout)
+    import yaml  # deferred: only needed when credentials come from the vault
+    return yaml.safe_load(result.stdout)
+
 
+def _creds(data):
     return (
         data["vmanage_url"],
         data["username"],
         data["password"],
     )
 
+
+def load_vmanage_envs(vault_file=VAULT_FILE):
+    """
+    Return {name: (url, username, password)} for every environment in the vault.
+
+    A vault with top-level vmanage_url/username/password is a single
+    environment called "default". A multi-target vault looks like:
+
+        default_environment: emea
+        environments:
+          emea: {vmanage_url: ..., username: ..., password: ...}
+          apac: {vmanage_url: ..., username: ..., password: ...}
+    """
+    data = _read_vault(vault_file)
+    if "environments" not in data:
+        return {"default": _creds(data)}
+    return {name: _creds(env) for name, env in data["environments"].items()}
+
+
+def load_vmanage_creds(env=None):
+    """
+    Decrypt vmanage_creds.yml using ansible-vault and return (url, username, password).
+
+    With a multi-target vault, env (or $VMANAGE_ENV, or default_environment)
+    selects the environment; otherwise the first one is used.
+    """
+    data = _read_vault()
+    if "environments" not in data:
+        return _creds(data)
+
+    envs = data["environments"]
+    name = env or os.environ.get("VMANAGE_ENV") or data.get("default_environment") or next(iter(envs))
+    if name not in envs:
+        raise KeyError(f"Environment '{name}' not found in {VAULT_FILE} (have: {', '.join(envs)})")
+    return _creds(envs[name])
@@ -0,0 +1,180 @@
+# deploy_batch.py
+import tabulate
+
+from ref_graph import RefGraph
+from object_index import _as_list
+from prefix_txn import PrefixTransaction
+
+
+class DeployError(Exception):
+    """A deploy request failed; `tasks` holds {policy_group_id: task_id} already started."""
+
+    def __init__(self, tasks, cause):
+        super().__init__(f"deploy failed after {len(tasks)} started: {cause}")
+        self.tasks = tasks
+
+
+class DeployBatch:
+    """Collect several prefix object edits and deploy each affected policy group once.
+
+    Edits are staged with stage(), written with push(), and deploy() then sends
+    one deployment per policy group that references any changed object, instead
+    of one fleet-wide redeploy per edit.
+    """
+
+    def __init__(self, vm, graph=None):
+        self.vm = vm
+        self.graph = graph
+        self.staged = {}    # parcel_id -> (profile_id, name, entries)
+        self.changed = {}   # parcel_id -> name, already pushed to vManage
+        self.deployed = set()   # policy groups already deployed for the current changes
+
+    def stage(self, profile_id, parcel_id, name, entries):
+        """Queue new entries for a parcel; a later stage() of the same parcel wins."""
+        self.staged[parcel_id] = (profile_id, name, entries)
+
+    def push(self):
+        """Write every staged edit as one transaction. Returns the TxnResult.
+
+        Either all staged parcels are updated and verified, or every parcel
+        already changed is restored and TransactionError is raised. Staged
+        edits are dropped in both cases.
+        """
+        txn = PrefixTransaction(self.vm)
+        for parcel_id, (profile_id, name, entries) in self.staged.items():
+            txn.add(profile_id, parcel_id, name, entries)
+        self.staged = {}
+        result = txn.commit()
+        # new content: every affected group needs a deploy again
+        self.deployed.clear()
+        for change in result.changes:
+            self.changed[change.parcel_id] = change.name
+        return result
+
+    def _graph(self):
+        if self.graph is None:
+            self.graph = RefGraph()
+        # incremental: only profiles/groups changed since the last refresh are re-read
+        failed = self.graph.refresh(self.vm)["failed"]
+        if failed:
+            print(f"Warning: could not read {len(failed)} profile/policy group item(s); "
+                  f"affected policy groups may be incomplete:")
+            for item in failed:
+                print(f"  - {item}")
+        return self.graph
+
+    def affected(self):
+        """Return {policy_group_id: {"name", "objects", "parcels", "devices"}} for all pushed edits.
+
+        Groups whose device associations could not be read carry an "error"
+        instead of being treated as having no devices.
+        """
+        graph = self._graph()
+        groups = {}
+        for parcel_id, obj_name in self.changed.items():
+            for pg in graph.impact(parcel_id)["policy-group"]:
+                if pg["id"] in self.deployed:
+                    continue
+                entry = groups.setdefault(pg["id"], {"name": pg["name"], "objects": [], "parcels": [], "devices": []})
+                entry["objects"].append(obj_name)
+                entry["parcels"].append(parcel_id)
+
+        # current associations, fetched concurrently
+        paths = {f"/v1/policy-group/{gid}/device/associate": gid for gid in groups}
+        for path, resp in self.vm.get_many(paths).items():
+            if isinstance(resp, Exception):
+                groups[paths[path]]["error"] = str(resp)
+                continue
+            groups[paths[path]]["devices"] = _as_list(resp)
+        return groups
+
+    def deploy(self, groups=None):
+        """Send one deploy per affected policy group. Returns {policy_group_id: task_id}.
+
+        If a deploy request fails, or a group's devices could not be read,
+        DeployError carries the tasks already started, and only parcels whose
+        policy groups were all handled are dropped from `changed`, so a retry
+        deploys the rest without redeploying running groups.
+        """
+        groups = self.affected() if groups is None else groups
+        tasks = {}
+        handled = set()
+        unresolved = []
+        try:
+            for gid, info in groups.items():
+                if info.get("error"):
+                    unresolved.append(f"{info['name']} ({info['error']})")
+                    continue
+                devices = [{"id": d.get("id") or d.get("uuid")} for d in info["devices"]]
+                if devices:
+                    resp = self.vm.post(f"/v1/policy-group/{gid}/device/deploy", {"devices": devices})
+                    task_id = (resp.get("parentTaskId") or resp.get("id")) if isinstance(resp, dict) else None
+                    if task_id:
+                        tasks[gid] = task_id
+                    self.deployed.add(gid)
+                handled.add(gid)
+        except Exception as e:
+            raise DeployError(tasks, e) from e
+        finally:
+            pending = {p for gid, info in groups.items() if gid not in handled for p in info.get("parcels", [])}
+            for parcel_id in list(self.changed):
+                if parcel_id not in pending:
+                    del self.changed[parcel_id]
+            if not self.changed:
+                self.deployed.clear()
+        if unresolved:
+            raise DeployError(tasks, "device associations could not be read for " + ", ".join(unresolved))
+        return tasks
+
+    def wait(self, tasks, on_progress=None):
+        """Wait for all deploy tasks concurrently. Returns {policy_group_id: TaskResult}."""
+        results = self.vm.track_tasks(tasks.values(), on_progress=on_progress)
+        return {gid: results[task_id] for gid, task_id in tasks.items()}
+
+
+def summarize_groups(groups):
+    """Rows of [policy group, objects, device count] for printing."""
+    return [[info["name"], ", ".join(sorted(set(info["objects"]))),
+             f"unknown ({info['error']})" if info.get("error") else len(info["devices"])]
+            for info in groups.values()]
+
+
+def summarize_task(result):
+    """Rows of [device, status, last activity] from a TaskResult."""
+    return [[device, state["status"], state["activity"]] for device, state in result.devices.items()]
+
+
+def confirm_and_deploy(batch):
+    """Show affected policy groups for all pushed edits, deploy once and track the tasks."""
+    if not batch.changed:
+        return
+
+    groups = batch.affected()
+    if not groups:
+        print("\nNo policy groups reference the changed objects; nothing to deploy.")
+        batch.changed.clear()
+        return
+
+    print("\n=== Pending deployment ===")
+    print(tabulate.tabulate(summarize_groups(groups),
+                            headers=["Policy Group", "Changed Objects", "Devices"], tablefmt="fancy_grid"))
+    total = sum(len(g["devices"]) for g in groups.values())
+    if input(f"Deploy {len(groups)} policy group(s) to {total} device(s) now? (y/n): ").strip().lower() != "y":
+        print("Deployment skipped; changes are saved in vManage but not deployed.")
+        return
+
+    try:
+        tasks = batch.deploy(groups)
+    except DeployError as e:
+        print(f"\nError: {e}")
+        if batch.changed:
+            print(f"{len(batch.changed)} changed object(s) still need a deployment.")
+        tasks = e.tasks
+    results = batch.wait(tasks, on_progress=lambda task_id, device, state: print(
+        f"  {device}: {state['status']} {state['activity']}"))
+    for gid, result in results.items():
+        print(f"\n=== Deploy result: {groups[gid]['name']} ({result.status}, {result.elapsed:.0f}s) ===")
+        print(tabulate.tabulate(summarize_task(result),
+                                headers=["Device", "Status", "Last Activity"], tablefmt="fancy_grid"))
+        if result.error:
+            print(f"Error: {result.error}")
@@ -0,0 +1,247 @@
+# event_stream.py
+import os
+import json
+import time
+import queue
+import hashlib
+import heapq
+import threading
+from collections import Counter
+
+from inventory_stats import device_items
+
+CURSOR_FILE = os.path.expanduser("~/scripts/cisco-sdwan/event_cursor.json")
+
+# stream kind -> POST endpoint returning one page plus pageInfo.scrollId
+PAGE_PATHS = {"alarms": "/alarms/page", "events": "/event/page"}
+
+
+def _utc(ms):
+    return time.strftime("%Y-%m-%dT%H:%M:%S UTC", time.gmtime(ms / 1000))
+
+
+def window_query(since_ms, until_ms, size=1000):
+    """Query body for entries with entry_time in [since_ms, until_ms]."""
+    return {
+        "query": {
+            "condition": "AND",
+            "rules": [{"field": "entry_time", "type": "date", "operator": "between",
+                       "value": [_utc(since_ms), _utc(until_ms)]}],
+        },
+        "size": size,
+    }
+
+
+def fetch_pages(vm, kind, since_ms, until_ms, page_size=1000):
+    """Yield pages (lists of records) for one time window, following scrollId."""
+    path = PAGE_PATHS[kind]
+    body = window_query(since_ms, until_ms, page_size)
+    scroll_id = None
+    while True:
+        # a page query only reads, so it is charged to the read bucket
+        resp = vm.post(f"{path}?scrollId={scroll_id}" if scroll_id else path, body, endpoint_class="read")
+        records = device_items(resp)
+        if records:
+            yield records
+        info = resp.get("pageInfo", {}) if isinstance(resp, dict) else {}
+        scroll_id = info.get("scrollId")
+        if not records or not scroll_id or not info.get("hasMoreData"):
+            return
+
+
+def prefetch(pages, depth=2):
+    """Fetch the next pages in a background thread while the caller processes
+    the current one; at most `depth` pages are buffered."""
+    buf = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def producer():
+        try:
+            for page in pages:
+                while not stop.is_set():
+                    try:
+                        buf.put(page, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+        except Exception as e:
+            buf.put(e)
+        buf.put(done)
+
+    threading.Thread(target=producer, daemon=True).start()
+    try:
+        while True:
+            item = buf.get()
+            if item is done:
+                return
+            if isinstance(item, Exception):
+                raise item
+            yield item
+    finally:
+        stop.set()
+
+
+def record_id(rec):
+    rid = rec.get("uuid") or rec.get("id") or rec.get("eventId")
+    if rid:
+        return str(rid)
+    return hashlib.sha1(json.dumps(rec, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def record_time(rec):
+    try:
+        return int(rec.get("entry_time", 0))
+    except (TypeError, ValueError):
+        return 0
+
+
+def record_system_ips(rec):
+    """System IPs a record refers to (events carry one, alarms a device list)."""
+    ips = []
+    if rec.get("system_ip"):
+        ips.append(rec["system_ip"])
+    for key in ("devices", "values"):
+        devs = rec.get(key) or []
+        for dev in devs if isinstance(devs, list) else [devs]:
+            ip = dev.get("system-ip") if isinstance(dev, dict) else None
+            if ip and ip not in ips:
+                ips.append(ip)
+    return ips
+
+
+class Cursor:
+    """Last entry_time seen per vManage and stream, plus the ids at that time
+    so the overlapping second is not processed twice. path=None keeps it in memory only."""
+
+    def __init__(self, path=CURSOR_FILE):
+        self.path = path
+        self.state = {}
+        if path and os.path.exists(path):
+            with open(path) as f:
+                self.state = json.load(f)
+
+    def get(self, host, kind):
+        entry = self.state.get(f"{host}/{kind}", {})
+        return entry.get("time"), set(entry.get("ids", []))
+
+    def set(self, host, kind, last_time, ids):
+        self.state[f"{host}/{kind}"] = {"time": last_time, "ids": sorted(ids)}
+
+    def save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f)
+        os.replace(tmp, self.path)
+
+
+class EventStream:
+    """Incremental alarm/event reader for one vManage.
+
+    read() covers the window from the cursor (or `lookback` seconds on first
+    use) to now and yields new records one at a time; pages are fetched ahead
+    in the background and only the ids at the newest timestamp are kept for
+    de-duplication, so memory does not grow with the burst size. The cursor
+    advances once the generator is exhausted.
+    """
+
+    def __init__(self, vm, kind, cursor=None, lookback=3600, page_size=1000):
+        self.vm = vm
+        self.kind = kind
+        self.cursor = cursor if cursor is not None else Cursor()
+        self.lookback = lookback
+        self.page_size = page_size
+
+    def read(self):
+        host = getattr(self.vm, "host", "")
+        now = int(time.time() * 1000)
+        last, seen = self.cursor.get(host, self.kind)
+        since = last if last is not None else now - self.lookback * 1000
+
+        newest, newest_ids = last or 0, set(seen)
+        pages = prefetch(fetch_pages(self.vm, self.kind, since, now, self.page_size))
+        for page in pages:
+            for rec in page:
+                t, rid = record_time(rec), record_id(rec)
+                if last is not None and (t < last or (t == last and rid in seen)):
+                    continue
+                if t > newest:
+                    newest, newest_ids = t, {rid}
+                elif t == newest:
+                    newest_ids.add(rid)
+                rec["kind"] = self.kind
+                yield rec
+
+        self.cursor.set(host, self.kind, newest or since, newest_ids)
+
+
+def correlate(records, devices):
+    """Attach host name, site and reachability from the /device inventory by system IP."""
+    by_ip = {d.get("system-ip"): d for d in devices}
+    for rec in records:
+        ips = record_system_ips(rec)
+        dev = next((by_ip[ip] for ip in ips if ip in by_ip), {})
+        rec["system_ips"] = ips
+        rec["device"] = {"host-name": dev.get("host-name", rec.get("host_name", "")),
+                         "site-id": dev.get("site-id", ""),
+                         "reachability": dev.get("reachability", dev.get("status", ""))}
+        yield rec
+
+
+def severity(rec):
+    return rec.get("severity") or rec.get("severity_level") or ""
+
+
+def title(rec):
+    return (rec.get("rule_name_display") or rec.get("eventname") or rec.get("type")
+            or rec.get("message") or "")
+
+
+class DeviceTimeline:
+    """Bounded per-device history: the newest `keep` records per system IP plus counters.
+
+    Pages may arrive newest- or oldest-first, so each device keeps a small
+    min-heap on entry_time instead of relying on arrival order.
+    """
+
+    def __init__(self, keep=10):
+        self.keep = keep
+        self.recent = {}
+        self.counts = Counter()
+        self.by_severity = Counter()
+        self.total = 0
+
+    def add(self, rec):
+        self.total += 1
+        self.by_severity[severity(rec).lower() or "unknown"] += 1
+        item = (record_time(rec), self.total, rec)
+        for ip in rec.get("system_ips") or record_system_ips(rec) or ["(none)"]:
+            self.counts[ip] += 1
+            heap = self.recent.setdefault(ip, [])
+            if len(heap) < self.keep:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                heapq.heapreplace(heap, item)
+
+    def consume(self, records):
+        for rec in records:
+            self.add(rec)
+        return self
+
+    def for_device(self, system_ip):
+        """Newest first."""
+        return [rec for _, _, rec in sorted(self.recent.get(system_ip, ()), key=lambda i: i[:2], reverse=True)]
+
+
+def event_row(rec):
+    return [_utc(record_time(rec)), rec.get("kind", ""), severity(rec),
+            rec.get("device", {}).get("host-name", "") or ", ".join(record_system_ips(rec)),
+            title(rec), "active" if rec.get("active") else ""]
+
+
+EVENT_HEADERS = ["Time", "Kind", "Severity", "Device", "Alarm/Event", ""]
@@ -1,52 +1,83 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
+from inventory_stats import GROUP_FIELDS, InventoryAggregator, device_items
+import argparse
 import sys
 import tabulate
 
 
-def main():
-    if len(sys.argv) >= 4:
-        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
-    else:
-        host, user, pwd = load_vmanage_creds()
-    vm = VManage(host, user, pwd)
+HEADERS = ["Host-Name", "Device Type", "Device ID",
+           "System IP", "Site ID", "Version", "Device Model"]
+
+
+def device_row(item):
+    # use .get() so we don’t crash if a field is missing
+    return [
+        item.get("host-name", ""),
+        item.get("device-type", ""),
+        item.get("uuid", ""),
+        item.get("system-ip", ""),
+        item.get("site-id", ""),
+        item.get("version", ""),
+        item.get("device-model", ""),
+    ]
 
+
+def collect(vm):
+    """Return (headers, rows) for the device inventory."""
     # vm.get() already returns JSON (dict or list)
-    resp = vm.get("/device")
+    items = device_items(vm.get("/device"))
+    return HEADERS, [device_row(item) for item in items]
 
-    # Normalise response into a list of items
-    if isinstance(resp, dict) and "data" in resp:
-        items = resp["data"]
-    elif isinstance(resp, list):
-        items = resp
-    else:
-        print("Unexpected /device response format:")
-        print(resp)
-        sys.exit(1)
 
-    headers = ["Host-Name", "Device Type", "Device ID",
-               "System IP", "Site ID", "Version", "Device Model"]
-    table = []
-
-    for item in items:
-        # use .get() so we don’t crash if a field is missing
-        row = [
-            item.get("host-name", ""),
-            item.get("device-type", ""),
-            item.get("uuid", ""),
-            item.get("system-ip", ""),
-            item.get("site-id", ""),
-            item.get("version", ""),
-            item.get("device-model", ""),
-        ]
-        table.append(row)
+def summarize(vm, group_by, top=20, drill=None):
+    """Return (headers, rows, drill_rows) grouped by site/model/version/reachability."""
+    agg = InventoryAggregator(group_by, drill=drill, row=device_row)
+    headers, rows = agg.consume(device_items(vm.get("/device"))).summary(top)
+    return headers, rows, agg.drill_rows
 
+
+def print_table(table, headers):
     try:
         print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
     except UnicodeEncodeError:
         print(tabulate.tabulate(table, headers, tablefmt="grid"))
 
 
+def run(vm, group_by=None, top=20, drill=None):
+    """Print the device inventory table, or a grouped summary if group_by is set."""
+    try:
+        if group_by:
+            headers, table, drill_rows = summarize(vm, group_by, top, drill)
+        else:
+            headers, table = collect(vm)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+
+    print_table(table, headers)
+    if group_by and drill is not None:
+        print(f"\n=== Devices with {group_by} = {drill} ({len(drill_rows)}) ===")
+        print_table(drill_rows, HEADERS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Show the vManage device inventory.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--group-by", choices=list(GROUP_FIELDS),
+                        help="print counts, versions, models and outliers per group instead of one row per device")
+    parser.add_argument("--top", type=int, default=20, help="with --group-by, largest groups to show (default: %(default)s)")
+    parser.add_argument("--drill", metavar="VALUE", help="with --group-by, also list the devices of this group")
+    args = parser.parse_args()
+
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+    vm = VManage(host, user, pwd)
+    run(vm, args.group_by, args.top, args.drill)
+
+
 if __name__ == "__main__":
     main()
 
@@ -14,21 +14,10 @@ def ms_to_date(ms_val):
     except Exception:
         return ms_val
 
-def main():
-    # --- Load Credentials ---
-    if len(sys.argv) >= 4:
-        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
-    else:
-        host, user, pwd = load_vmanage_creds()
-
-    vm = VManage(host, user, pwd)
-
+def collect(vm):
+    """Return (headers, rows) for all policy groups and their associated devices."""
     # --- Fetch Policy Groups ---
-    try:
-        resp = vm.get("/v1/policy-group")
-    except Exception as e:
-        print(f"Error fetching policy groups: {e}")
-        sys.exit(1)
+    resp = vm.get("/v1/policy-group")
 
     # Normalize to list
     if isinstance(resp, dict) and "data" in resp:
@@ -36,9 +25,7 @@ def main():
     elif isinstance(resp, list):
         policy_groups = resp
     else:
-        print("Unexpected /policy-group response format:")
-        print(resp)
-        sys.exit(1)
+        raise ValueError(f"Unexpected /policy-group response format:\n{resp}")
 
     # Table headers
     headers = [
@@ -93,8 +80,31 @@ def main():
             associated_devices
         ])
 
+    return headers, table
+
+def run(vm):
+    """Print all policy groups with their associated devices."""
+    try:
+        headers, table = collect(vm)
+    except ValueError as e:
+        print(e)
+        sys.exit(1)
+    except Exception as e:
+        print(f"Error fetching policy groups: {e}")
+        sys.exit(1)
+
     # --- Print ---
     print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
 
+def main():
+    # --- Load Credentials ---
+    if len(sys.argv) >= 4:
+        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+
+    vm = VManage(host, user, pwd)
+    run(vm)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,148 @@
+# inventory_stats.py
+from collections import Counter
+
+# --group-by choice -> /device fields to try, in order
+GROUP_FIELDS = {
+    "site": ("site-id",),
+    "model": ("device-model",),
+    "version": ("version",),
+    # different versions use 'reachability' or 'status'
+    "reachability": ("reachability", "status"),
+}
+
+SUMMARY_HEADERS = ["Devices", "Reachable", "Unreachable", "Versions", "Models", "Outliers"]
+
+
+def device_items(resp):
+    """Normalise a /device response into a list of records."""
+    if isinstance(resp, dict) and "data" in resp:
+        return resp["data"]
+    if isinstance(resp, list):
+        return resp
+    raise ValueError(f"Unexpected /device response format:\n{resp}")
+
+
+def group_value(device, group_by):
+    for field in GROUP_FIELDS[group_by]:
+        value = device.get(field)
+        if value not in (None, ""):
+            return str(value)
+    return "(none)"
+
+
+def is_reachable(device):
+    return str(device.get("reachability", device.get("status", ""))).lower() == "reachable"
+
+
+def _top(counter, n=3):
+    return ", ".join(f"{k} ({c})" for k, c in counter.most_common(n)) + (" ..." if len(counter) > n else "")
+
+
+class _Group:
+    __slots__ = ("count", "reachable", "versions", "models", "unreachable", "unreachable_versions", "by_version")
+
+    def __init__(self):
+        self.count = 0
+        self.reachable = 0
+        self.versions = Counter()
+        self.models = Counter()
+        self.unreachable = []     # sample of unreachable (device id, host name)
+        self.unreachable_versions = Counter()   # version -> unreachable devices
+        self.by_version = {}      # version -> sample of (device id, host name)
+
+
+class InventoryAggregator:
+    """Group /device records by site, model, version or reachability in one pass.
+
+    Only counters and a few sample host names per group are kept, so memory
+    grows with the number of groups rather than the number of devices.
+    Outliers are unreachable devices and devices whose version differs from
+    the most common version in their group. If `drill` is set, rows for the
+    devices in that group are built with `row` during the same pass.
+    """
+
+    def __init__(self, group_by, sample=5, drill=None, row=None):
+        if group_by not in GROUP_FIELDS:
+            raise ValueError(f"cannot group by '{group_by}' (choose from {', '.join(GROUP_FIELDS)})")
+        self.group_by = group_by
+        self.sample = sample
+        self.drill = drill
+        self.row = row
+        self.groups = {}
+        self.total = _Group()
+        self.drill_rows = []
+
+    def add(self, device):
+        key = group_value(device, self.group_by)
+        name = device.get("host-name") or device.get("system-ip", "")
+        dev_id = device.get("uuid") or device.get("system-ip") or name
+        version = str(device.get("version", "")) or "(none)"
+        reachable = is_reachable(device)
+
+        for g in (self.groups.setdefault(key, _Group()), self.total):
+            g.count += 1
+            g.versions[version] += 1
+            g.models[device.get("device-model", "") or "(none)"] += 1
+            if reachable:
+                g.reachable += 1
+            else:
+                g.unreachable_versions[version] += 1
+                if len(g.unreachable) < self.sample:
+                    g.unreachable.append((dev_id, name))
+            hosts = g.by_version.setdefault(version, [])
+            if len(hosts) < self.sample:
+                hosts.append((dev_id, name))
+
+        if self.drill is not None and key == self.drill and self.row:
+            self.drill_rows.append(self.row(device))
+
+    def consume(self, devices):
+        for device in devices:
+            self.add(device)
+        return self
+
+    def _outliers(self, g):
+        """Sample of unreachable and minority-version devices; a device that is
+        both is listed and counted once, with both reasons."""
+        reasons = {}   # device id -> (host name, [reasons])
+        for dev_id, name in g.unreachable:
+            reasons.setdefault(dev_id, (name, []))[1].append("unreachable")
+        total = g.count - g.reachable
+        if self.group_by != "version" and len(g.versions) > 1:
+            majority, majority_count = g.versions.most_common(1)[0]
+            # minority-version devices that are also unreachable are already counted
+            total += g.count - majority_count - sum(
+                n for version, n in g.unreachable_versions.items() if version != majority)
+            for version, hosts in g.by_version.items():
+                if version != majority:
+                    for dev_id, name in hosts:
+                        reasons.setdefault(dev_id, (name, []))[1].append(version)
+        items = [f"{name} ({', '.join(why)})" for name, why in reasons.values()]
+        shown = items[:self.sample]
+        more = total - len(shown)
+        return ", ".join(shown) + (f" +{more} more" if more > 0 else "")
+
+    def _row(self, label, g):
+        return [label, g.count, g.reachable, g.count - g.reachable,
+                _top(g.versions), _top(g.models), self._outliers(g)]
+
+    def summary(self, top=20):
+        """Return (headers, rows): the `top` largest groups, the rest folded into one row, and a total."""
+        ordered = sorted(self.groups.items(), key=lambda kv: (-kv[1].count, kv[0]))
+        rows = [self._row(key, g) for key, g in ordered[:top]]
+
+        rest = ordered[top:]
+        if rest:
+            other = _Group()
+            for _, g in rest:
+                other.count += g.count
+                other.reachable += g.reachable
+                other.versions.update(g.versions)
+                other.models.update(g.models)
+            rows.append([f"({len(rest)} other groups)", other.count, other.reachable,
+                         other.count - other.reachable, _top(other.versions), _top(other.models), ""])
+
+        rows.append([f"TOTAL ({len(self.groups)} groups)", self.total.count, self.total.reachable,
+                     self.total.count - self.total.reachable,
+                     _top(self.total.versions), _top(self.total.models), ""])
+        return [self.group_by.capitalize()] + SUMMARY_HEADERS, rows
@@ -1,6 +1,7 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
-import sys
+from event_stream import Cursor, DeviceTimeline, EventStream, event_row
+import argparse
 import tabulate
 from datetime import datetime, timezone
 
@@ -31,16 +32,11 @@ def format_uptime_ms(ms_value):
     parts.append(f"{minutes}m")
     return " ".join(parts)
 
-def main():
-    if len(sys.argv) >= 4:
-        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
-    else:
-        host, user, pwd = load_vmanage_creds()
-    vm = VManage(host, user, pwd)
-
+def collect(vm):
+    """Return (headers, rows) with state and uptime per device."""
     devices = vm.get("device")
-    print("\n=== Device Health Summary ===")
-    print(f"{'HOSTNAME':30} {'SYSTEM-IP':15} {'STATE':10} {'UPTIME'}")
+    headers = ["Hostname", "System-IP", "State", "Uptime"]
+    rows = []
 
     for d in devices["data"]:
         hostname = d.get("host-name", "unknown")
@@ -56,8 +52,56 @@ def main():
 
         uptime_str = format_uptime_ms(raw_uptime) if raw_uptime else "n/a"
 
+        rows.append([hostname, systemip, status, uptime_str])
+    return headers, rows
+
+def explain(vm, rows, minutes=60, keep=5):
+    """Show the latest alarms of every device that is not in 'normal' state.
+
+    All alarms of the window are streamed once; only the newest few per
+    device are kept, so a burst during an outage does not pile up in memory.
+    """
+    down = [(hostname, systemip, status) for hostname, systemip, status, _ in rows if status != "normal"]
+    if not down:
+        return
+    stream = EventStream(vm, "alarms", Cursor(None), lookback=minutes * 60)
+    timeline = DeviceTimeline(keep=keep).consume(stream.read())
+
+    print(f"\n=== Alarms in the last {minutes} min for devices not in normal state ===")
+    for hostname, systemip, status in down:
+        alarms = timeline.for_device(systemip)
+        print(f"\n{hostname} ({systemip}) {status}: {timeline.counts.get(systemip, 0)} alarm(s)")
+        for rec in alarms:
+            time_str, _, severity, _, name, active = event_row(rec)
+            print(f"  {time_str}  {severity:8} {name} {active}")
+
+def run(vm, events=None):
+    """Print state and uptime for every device; with events=N, also the alarms
+    of the last N minutes for devices that are not healthy."""
+    _, rows = collect(vm)
+    print("\n=== Device Health Summary ===")
+    print(f"{'HOSTNAME':30} {'SYSTEM-IP':15} {'STATE':10} {'UPTIME'}")
+
+    for hostname, systemip, status, uptime_str in rows:
         print(f"{hostname:30} {systemip:15} {status:10} {uptime_str}")
 
+    if events:
+        explain(vm, rows, events)
+
+def main():
+    parser = argparse.ArgumentParser(description="Show device state and uptime.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--events", type=int, nargs="?", const=60, metavar="MINUTES",
+                        help="also show recent alarms for devices not in normal state (default window: 60)")
+    args = parser.parse_args()
+
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+    vm = VManage(host, user, pwd)
+    run(vm, args.events)
+
 if __name__ == "__main__":
     main()
 
@@ -0,0 +1,68 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_envs
+from commands import READ_COMMANDS, load_command
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+import argparse
+import csv
+import sys
+import tabulate
+
+
+def run_target(script, env, creds):
+    """Log in to one vManage and collect the script's rows. Returns (env, headers, rows, error)."""
+    try:
+        vm = VManage(*creds)
+        headers, rows = load_command(script).collect(vm)
+        return env, headers, rows, None
+    except Exception as e:
+        return env, [], [], str(e)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run a read-only report against every vManage in the vault and merge the results.")
+    parser.add_argument("script", choices=READ_COMMANDS, help="report to run")
+    parser.add_argument("--env", action="append", default=[],
+                        help="limit to these environments (repeatable, default: all)")
+    parser.add_argument("--processes", action="store_true",
+                        help="one process per target instead of one thread")
+    parser.add_argument("--csv", metavar="FILE", help="also write the merged table to CSV")
+    args = parser.parse_args()
+
+    envs = load_vmanage_envs()
+    unknown = [e for e in args.env if e not in envs]
+    if unknown:
+        print(f"Unknown environment(s): {', '.join(unknown)} (have: {', '.join(envs)})")
+        sys.exit(1)
+    targets = {name: envs[name] for name in (args.env or envs)}
+
+    executor = ProcessPoolExecutor if args.processes else ThreadPoolExecutor
+    with executor(max_workers=len(targets)) as pool:
+        futures = [pool.submit(run_target, args.script, name, creds) for name, creds in targets.items()]
+        results = [f.result() for f in futures]
+
+    headers, table, errors = None, [], []
+    for env, env_headers, rows, error in results:
+        if error:
+            errors.append([env, error])
+            continue
+        headers = headers or ["Source"] + list(env_headers)
+        table.extend([env] + list(row) for row in rows)
+
+    if headers:
+        print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+        if args.csv:
+            with open(args.csv, "w", newline="") as csvfile:
+                writer = csv.writer(csvfile)
+                writer.writerow(headers)
+                writer.writerows(table)
+            print(f"Saved table to {args.csv}")
+
+    if errors:
+        print("\n=== Failed targets ===")
+        print(tabulate.tabulate(errors, ["Source", "Error"], tablefmt="fancy_grid"))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
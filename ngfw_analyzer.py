@@ -0,0 +1,277 @@
+# ngfw_analyzer.py
+import heapq
+import ipaddress
+import json
+from bisect import bisect_right
+
+from object_index import ObjectCache, _leaf_values, _port_range, entry_rows
+
+# Policy objects NGFW sequences reference by refId
+NGFW_OBJECT_TYPES = ["security-data-ip-prefix", "security-port"]
+
+IPV4_ANY = [(0, 2 ** 32 - 1)]
+PORT_ANY = [(0, 65535)]
+PROTOCOL_ANY = [(0, 255)]
+
+# match entry key -> (dimension, how its values are read)
+MATCH_FIELDS = {
+    "sourceIp": ("src", "ip"),
+    "destinationIp": ("dst", "ip"),
+    "sourceDataPrefixList": ("src", "ip-ref"),
+    "destinationDataPrefixList": ("dst", "ip-ref"),
+    "sourcePort": ("sport", "port"),
+    "destinationPort": ("dport", "port"),
+    "sourcePortList": ("sport", "port-ref"),
+    "destinationPortList": ("dport", "port-ref"),
+    "protocol": ("proto", "port"),
+}
+
+DIMENSIONS = {"src": IPV4_ANY, "dst": IPV4_ANY, "sport": PORT_ANY, "dport": PORT_ANY, "proto": PROTOCOL_ANY}
+
+
+def merge(intervals):
+    """Sort and merge (lo, hi) integer intervals; adjacent ranges are joined."""
+    out = []
+    for lo, hi in sorted(intervals):
+        if out and lo <= out[-1][1] + 1:
+            if hi > out[-1][1]:
+                out[-1] = (out[-1][0], hi)
+        else:
+            out.append((lo, hi))
+    return out
+
+
+def contains(outer, inner):
+    """True if every interval of merged set `inner` lies inside merged set `outer`."""
+    i = 0
+    for lo, hi in inner:
+        while i < len(outer) and outer[i][1] < lo:
+            i += 1
+        if i == len(outer) or outer[i][0] > lo or outer[i][1] < hi:
+            return False
+    return True
+
+
+def intersects(a, b):
+    """True if two merged interval sets share at least one value."""
+    i = j = 0
+    while i < len(a) and j < len(b):
+        if a[i][1] < b[j][0]:
+            i += 1
+        elif b[j][1] < a[i][0]:
+            j += 1
+        else:
+            return True
+    return False
+
+
+class Rule:
+    """One NGFW sequence compiled to interval sets per dimension.
+
+    Values of an address/port field that are not intervals (IPv6, FQDN,
+    unresolved objects, ...) are alternatives within that dimension and kept
+    per dimension in `alternatives`; a dimension with only such values has
+    an empty interval set. Match fields with no dimension (geo, apps, ...)
+    are extra conditions kept in `opaque`; a rule can only cover another if
+    its opaque conditions are a subset.
+    """
+
+    __slots__ = ("parcel", "name", "seq_id", "action", "enabled", "dims", "alternatives", "opaque")
+
+    def __init__(self, parcel, name, seq_id, action, enabled):
+        self.parcel = parcel
+        self.name = name
+        self.seq_id = seq_id
+        self.action = action
+        self.enabled = enabled
+        self.dims = {}
+        self.alternatives = {}   # dimension -> set of values that are not intervals
+        self.opaque = set()
+
+    def dim(self, key):
+        return self.dims.get(key, DIMENSIONS[key])
+
+    def is_any(self, key):
+        """True if the rule does not constrain this dimension at all."""
+        return key not in self.dims and key not in self.alternatives
+
+    def span(self, key):
+        """(lo, hi) bounds of the dimension; the whole domain if it has alternatives."""
+        intervals = DIMENSIONS[key] if key in self.alternatives else self.dim(key)
+        return intervals[0][0], intervals[-1][1]
+
+    def covers(self, other):
+        if not self.opaque <= other.opaque:
+            return False
+        for k in DIMENSIONS:
+            if self.is_any(k):
+                continue
+            # alternatives (e.g. IPv6 entries) are only covered by the same values
+            if other.is_any(k) or not other.alternatives.get(k, set()) <= self.alternatives.get(k, set()):
+                return False
+            if not contains(self.dim(k), other.dim(k)):
+                return False
+        return True
+
+    def overlaps(self, other):
+        # differing opaque conditions may still match the same traffic, so only the dimensions decide
+        return all(self.is_any(k) or other.is_any(k) or intersects(self.dim(k), other.dim(k))
+                   or self.alternatives.get(k, set()) & other.alternatives.get(k, set())
+                   for k in DIMENSIONS)
+
+    def label(self):
+        return f"{self.seq_id} {self.name}".strip()
+
+
+def _ip_intervals(values):
+    out, rest = [], []
+    for value in values:
+        try:
+            net = ipaddress.ip_network(str(value).strip(), strict=False)
+        except ValueError:
+            rest.append(value)
+            continue
+        if net.version == 4:
+            out.append((int(net.network_address), int(net.broadcast_address)))
+        else:
+            rest.append(value)
+    return out, rest
+
+
+def _port_intervals(values):
+    out, rest = [], []
+    for value in values:
+        for part in str(value).split():
+            rng = _port_range(part)
+            if rng:
+                out.append(rng)
+            else:
+                rest.append(part)
+    return out, rest
+
+
+def compile_sequence(cache, parcel_name, seq):
+    """Build a Rule from an NGFW sequence, resolving prefix/port lists through cache."""
+    rule = Rule(parcel_name,
+                seq.get("sequenceName", {}).get("value", ""),
+                seq.get("sequenceId", {}).get("value", ""),
+                seq.get("baseAction", {}).get("value", ""),
+                not seq.get("disableSequence", {}).get("value", False))
+
+    parts, alternatives = {}, {}
+    for entry in seq.get("match", {}).get("entries", []):
+        for key, node in entry.items():
+            dim, kind = MATCH_FIELDS.get(key, (None, None))
+            if dim is None:
+                rule.opaque.add(f"{key}={json.dumps(node, sort_keys=True)}")
+                continue
+
+            values = [v for _, v in _leaf_values(node)]
+            if kind.endswith("-ref"):
+                resolved = []
+                for ref in values:
+                    data = cache.data(ref)
+                    if not data:
+                        alternatives.setdefault(dim, set()).add(f"unresolved:{ref}")
+                        continue
+                    for field, value, row_kind, lo, hi in entry_rows(data.get("entries", [])):
+                        if row_kind in ("prefix4", "port"):
+                            resolved.append((lo, hi))
+                        else:
+                            alternatives.setdefault(dim, set()).add(str(value))
+                parts.setdefault(dim, []).extend(resolved)
+                continue
+
+            intervals, rest = (_ip_intervals if kind == "ip" else _port_intervals)(values)
+            parts.setdefault(dim, []).extend(intervals)
+            if rest:
+                alternatives.setdefault(dim, set()).update(str(v) for v in rest)
+
+    for dim, intervals in parts.items():
+        # a field with only non-interval values matches no IPv4 address/port range
+        if intervals or dim in alternatives:
+            rule.dims[dim] = merge(intervals)
+    rule.alternatives = alternatives
+    return rule
+
+
+def _overlapping_spans(spans):
+    """Number of pairs among (lo, hi) spans that intersect, in O(n log n)."""
+    starts = sorted(lo for lo, _ in spans)
+    n = len(spans)
+    # every disjoint pair is counted once, from the span that ends first
+    disjoint = sum(n - bisect_right(starts, hi) for _, hi in spans)
+    return n * (n - 1) // 2 - disjoint
+
+
+def candidate_pairs(rules):
+    """Yield (i, j), i < j, for rules whose bounding spans overlap in every dimension.
+
+    The sweep runs over the dimension whose spans overlap least in this rule
+    set, so a policy where every rule matches any destination is swept on
+    source or port instead; the other dimensions' spans filter the pairs it
+    produces. Rules that are disjoint in any dimension can neither cover nor
+    overlap each other.
+    """
+    spans = {k: [r.span(k) for r in rules] for k in DIMENSIONS}
+    key = min(DIMENSIONS, key=lambda k: _overlapping_spans(spans[k]))
+    others = [spans[k] for k in DIMENSIONS if k != key]
+
+    active = []   # heap of (span end, rule number)
+    for lo, hi, n in sorted((lo, hi, n) for n, (lo, hi) in enumerate(spans[key])):
+        while active and active[0][0] < lo:
+            heapq.heappop(active)
+        for _, m in active:
+            if all(s[m][0] <= s[n][1] and s[n][0] <= s[m][1] for s in others):
+                yield (m, n) if m < n else (n, m)
+        heapq.heappush(active, (hi, n))
+
+
+def analyze_rules(rules):
+    """Return findings for one ordered list of rules (a single NGFW parcel).
+
+    - shadowed: an earlier rule with a different action matches all its traffic
+    - redundant: an earlier rule with the same action matches all its traffic
+    - overlap: an earlier rule with a different action matches part of its traffic
+    Disabled sequences are ignored.
+    """
+    active = [r for r in rules if r.enabled]
+    first_cover = {}
+    overlaps = []
+    for i, j in sorted(candidate_pairs(active)):
+        earlier, later = active[i], active[j]
+        if j in first_cover:
+            continue
+        if earlier.covers(later):
+            first_cover[j] = i
+        elif earlier.action != later.action and earlier.overlaps(later):
+            overlaps.append((i, j))
+
+    flagged = [(j, i, "redundant" if active[i].action == active[j].action else "shadowed")
+               for j, i in first_cover.items()]
+    flagged += [(j, i, "overlap") for i, j in overlaps if j not in first_cover]
+
+    findings = []
+    for j, i, kind in sorted(flagged):
+        earlier, later = active[i], active[j]
+        findings.append({"parcel": later.parcel, "kind": kind, "rule": later.label(), "action": later.action,
+                         "by": earlier.label(), "by_action": earlier.action})
+    return findings
+
+
+def _seq_order(indexed):
+    n, seq = indexed
+    value = seq.get("sequenceId", {}).get("value", "")
+    return (int(value), n) if str(value).isdigit() else (float("inf"), n)
+
+
+def analyze_parcels(vm, parcels, cache=None):
+    """Compile and analyze every NGFW parcel of a policy. Returns a list of findings."""
+    cache = cache or ObjectCache(vm, types=NGFW_OBJECT_TYPES)
+    findings = []
+    for parcel in parcels:
+        payload = parcel.get("payload", {})
+        sequences = [s for _, s in sorted(enumerate(payload.get("data", {}).get("sequences", [])), key=_seq_order)]
+        rules = [compile_sequence(cache, payload.get("name", ""), seq) for seq in sequences]
+        findings.extend(analyze_rules(rules))
+    return findings
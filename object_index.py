@@ -0,0 +1,401 @@
+# object_index.py
+import os
+import json
+import time
+import sqlite3
+import ipaddress
+import threading
+
+INDEX_FILE = os.path.expanduser("~/scripts/cisco-sdwan/policy_objects.db")
+
+# Seconds after which ObjectCache stops trusting the local index and reloads from vManage
+INDEX_MAX_AGE = 24 * 3600
+
+POLICY_OBJECT_PATH = "/v1/feature-profile/sdwan/policy-object"
+
+# Parcel types mirrored from every policy-object profile.
+# Types a given vManage release does not know are skipped during sync.
+POLICY_OBJECT_TYPES = [
+    "security-data-ip-prefix",
+    "data-prefix",
+    "data-ipv6-prefix",
+    "prefix",
+    "ipv6-prefix",
+    "security-port",
+    "security-fqdn",
+    "security-geolocation",
+    "security-urllist",
+    "security-localdomain",
+    "security-localapp",
+    "security-identity",
+    "security-protocolname",
+    "security-scalablegrouptag",
+    "security-zone",
+    "app-list",
+    "app-probe",
+    "sla-class",
+    "preferred-color-group",
+    "color",
+    "tloc",
+    "policer",
+    "class",
+    "mirror",
+    "as-path",
+    "standard-community",
+    "expanded-community",
+    "extended-community",
+]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS objects (
+    parcel_id    TEXT PRIMARY KEY,
+    profile_id   TEXT,
+    parcel_type  TEXT,
+    name         TEXT,
+    description  TEXT,
+    last_updated INTEGER,
+    payload      TEXT
+);
+CREATE TABLE IF NOT EXISTS entries (
+    parcel_id TEXT,
+    field     TEXT,
+    value     TEXT,
+    kind      TEXT,
+    lo        INTEGER,
+    hi        INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_objects_name ON objects(name COLLATE NOCASE);
+CREATE INDEX IF NOT EXISTS idx_entries_value ON entries(value);
+CREATE INDEX IF NOT EXISTS idx_entries_range ON entries(kind, lo, hi);
+CREATE INDEX IF NOT EXISTS idx_entries_parcel ON entries(parcel_id);
+CREATE VIRTUAL TABLE IF NOT EXISTS objects_fts USING fts5(
+    parcel_id UNINDEXED, name, description, vals
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+
+def _as_list(resp):
+    if isinstance(resp, dict) and "data" in resp:
+        return resp["data"]
+    if isinstance(resp, list):
+        return resp
+    return []
+
+
+def _leaf_values(node, field=None):
+    """Yield (field, value) for every {"value": ...} leaf in a parcel entry."""
+    if isinstance(node, dict):
+        if "value" in node and not isinstance(node["value"], (dict, list)):
+            yield field, node["value"]
+        elif "value" in node and isinstance(node["value"], list):
+            for v in node["value"]:
+                if not isinstance(v, (dict, list)):
+                    yield field, v
+        for k, v in node.items():
+            if k != "value":
+                yield from _leaf_values(v, k)
+    elif isinstance(node, list):
+        for item in node:
+            yield from _leaf_values(item, field)
+
+
+def _port_range(value):
+    """Return (lo, hi) for '443' or '8000-8080', else None."""
+    text = str(value).strip()
+    lo, sep, hi = text.partition("-")
+    if not sep:
+        hi = lo
+    if lo.strip().isdigit() and hi.strip().isdigit():
+        return int(lo), int(hi)
+    return None
+
+
+def entry_rows(entries):
+    """Flatten parcel entries into (field, value, kind, lo, hi) rows."""
+    rows = []
+    for entry in entries:
+        values = list(_leaf_values(entry))
+        fields = dict(values)
+
+        # data-prefix style: address and length in separate fields
+        if "ipv4Address" in fields and "ipv4PrefixLength" in fields:
+            values = [("ipPrefix", f"{fields['ipv4Address']}/{fields['ipv4PrefixLength']}")]
+        elif "ipv6Address" in fields and "ipv6PrefixLength" in fields:
+            values = [("ipv6Prefix", f"{fields['ipv6Address']}/{fields['ipv6PrefixLength']}")]
+
+        for field, value in values:
+            text = str(value)
+            kind, lo, hi = "text", None, None
+            try:
+                net = ipaddress.ip_network(text, strict=False)
+                if net.version == 4:
+                    kind, lo, hi = "prefix4", int(net.network_address), int(net.broadcast_address)
+                else:
+                    kind = "prefix6"
+            except ValueError:
+                if field and "port" in field.lower():
+                    for part in text.split():
+                        rng = _port_range(part)
+                        if rng:
+                            rows.append((field, part, "port", rng[0], rng[1]))
+                    continue
+            rows.append((field, text, kind, lo, hi))
+    return rows
+
+
+def _unsupported(exc):
+    """True if a failed parcel-type fetch means the type does not exist on this release."""
+    status = getattr(getattr(exc, "response", None), "status_code", None)
+    return status in (400, 404)
+
+
+def fetch_policy_objects(vm, types=None, max_workers=None):
+    """Fetch every parcel of every policy-object profile concurrently.
+
+    Returns a list of (profile_id, parcel_type, parcel). Parcel types the
+    release does not know (400/404) are skipped; any other failure raises,
+    so callers never mistake a partial fetch for the full set.
+    """
+    types = types or POLICY_OBJECT_TYPES
+    profiles = _as_list(vm.get(POLICY_OBJECT_PATH))
+
+    paths = {}
+    for p in profiles:
+        profile_id = p.get("profileId", "")
+        for t in types:
+            paths[f"{POLICY_OBJECT_PATH}/{profile_id}/{t}"] = (profile_id, t)
+
+    parcels = []
+    for path, resp in vm.get_many(paths, max_workers=max_workers).items():
+        if isinstance(resp, Exception):
+            if _unsupported(resp):
+                continue  # parcel type not supported on this release
+            raise resp
+        profile_id, parcel_type = paths[path]
+        for parcel in _as_list(resp):
+            parcels.append((profile_id, parcel_type, parcel))
+    return parcels
+
+
+class ObjectIndex:
+    """Local SQLite mirror of all policy-object parcels."""
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open_existing(cls, path=INDEX_FILE):
+        """Return an index for an already-synced file, or None."""
+        if not os.path.isfile(path):
+            return None
+        return cls(path)
+
+    def close(self):
+        self.db.close()
+
+    # --- sync ---
+
+    def sync(self, vm, types=None, max_workers=None):
+        """Replace the index contents with a fresh copy from vManage.
+
+        The tables are only touched once every fetch has succeeded; on error
+        the previous contents stay in place.
+        """
+        parcels = fetch_policy_objects(vm, types=types, max_workers=max_workers)
+
+        with self.lock, self.db:
+            self.db.execute("DELETE FROM objects")
+            self.db.execute("DELETE FROM entries")
+            self.db.execute("DELETE FROM objects_fts")
+            for profile_id, parcel_type, parcel in parcels:
+                self._insert(profile_id, parcel_type, parcel)
+            self.db.executemany(
+                "INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)",
+                [("synced_host", vm.host), ("synced_at", str(time.time()))],
+            )
+        return len(parcels)
+
+    def meta(self, key, default=None):
+        rows = self._query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0]["value"] if rows else default
+
+    def age(self):
+        """Seconds since the last sync, or None if the index was never synced."""
+        try:
+            return time.time() - float(self.meta("synced_at"))
+        except (TypeError, ValueError):
+            return None
+
+    def usable_for(self, host, max_age=INDEX_MAX_AGE):
+        """Why the index cannot stand in for a live fetch from host, or None if it can."""
+        if not self.count():
+            return "index is empty"
+        synced_host = self.meta("synced_host")
+        if synced_host != host:
+            return f"index was synced from {synced_host or 'an unknown host'}"
+        age = self.age()
+        if age is None or age > max_age:
+            return f"index is older than {max_age / 3600:.0f}h"
+        return None
+
+    def _insert(self, profile_id, parcel_type, parcel):
+        payload = parcel.get("payload", {})
+        parcel_id = parcel.get("parcelId", "")
+        name = payload.get("name", "")
+        description = payload.get("description", "")
+        rows = entry_rows(payload.get("data", {}).get("entries", []))
+
+        self.db.execute(
+            "INSERT OR REPLACE INTO objects VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (parcel_id, profile_id, parcel_type, name, description,
+             parcel.get("lastUpdatedOn"), json.dumps(parcel)),
+        )
+        self.db.executemany(
+            "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+            [(parcel_id,) + r for r in rows],
+        )
+        self.db.execute(
+            "INSERT INTO objects_fts VALUES (?, ?, ?, ?)",
+            (parcel_id, name, description, " ".join(r[1] for r in rows)),
+        )
+
+    # --- lookups ---
+
+    def _query(self, sql, args=()):
+        with self.lock:
+            return [dict(r) for r in self.db.execute(sql, args).fetchall()]
+
+    def count(self):
+        return self._query("SELECT COUNT(*) AS n FROM objects")[0]["n"]
+
+    def objects(self, parcel_type=None):
+        if parcel_type:
+            return self._query(
+                "SELECT * FROM objects WHERE parcel_type = ? ORDER BY name", (parcel_type,))
+        return self._query("SELECT * FROM objects ORDER BY parcel_type, name")
+
+    def by_id(self, parcel_id):
+        rows = self._query("SELECT * FROM objects WHERE parcel_id = ?", (parcel_id,))
+        return rows[0] if rows else None
+
+    def by_name(self, name):
+        return self._query(
+            "SELECT * FROM objects WHERE name = ? COLLATE NOCASE ORDER BY parcel_type", (name,))
+
+    def search(self, text, limit=50):
+        """Full-text search over names, descriptions and entry values."""
+        terms = " ".join(f'"{t}"*' for t in text.replace('"', " ").split())
+        if not terms:
+            return []
+        return self._query(
+            "SELECT o.* FROM objects_fts f JOIN objects o ON o.parcel_id = f.parcel_id "
+            "WHERE objects_fts MATCH ? ORDER BY rank LIMIT ?",
+            (terms, limit),
+        )
+
+    def by_prefix(self, address):
+        """Objects with an entry containing the given IP address or network."""
+        net = ipaddress.ip_network(address, strict=False)
+        if net.version == 4:
+            return self._query(
+                "SELECT DISTINCT o.*, e.value AS matched FROM entries e "
+                "JOIN objects o ON o.parcel_id = e.parcel_id "
+                "WHERE e.kind = 'prefix4' AND e.lo <= ? AND e.hi >= ?",
+                (int(net.network_address), int(net.broadcast_address)),
+            )
+
+        matches = []
+        for row in self._query("SELECT parcel_id, value FROM entries WHERE kind = 'prefix6'"):
+            if net.subnet_of(ipaddress.ip_network(row["value"], strict=False)):
+                obj = self.by_id(row["parcel_id"])
+                obj["matched"] = row["value"]
+                matches.append(obj)
+        return matches
+
+    def by_port(self, port):
+        """Objects with a port entry covering the given port number."""
+        port = int(port)
+        return self._query(
+            "SELECT DISTINCT o.*, e.value AS matched FROM entries e "
+            "JOIN objects o ON o.parcel_id = e.parcel_id "
+            "WHERE e.kind = 'port' AND e.lo <= ? AND e.hi >= ?",
+            (port, port),
+        )
+
+    def lookup(self, term):
+        """Best-effort lookup by UUID, prefix, port, exact name, then full text."""
+        obj = self.by_id(term)
+        if obj:
+            return [obj]
+        try:
+            return self.by_prefix(term)
+        except ValueError:
+            pass
+        if term.isdigit() and int(term) <= 65535:
+            return self.by_port(term)
+        return self.by_name(term) or self.search(term)
+
+    def name_for(self, ref_id, default=None):
+        obj = self.by_id(ref_id)
+        return obj["name"] if obj else default
+
+    def entries_for(self, parcel_id):
+        return self._query(
+            "SELECT field, value, kind FROM entries WHERE parcel_id = ?", (parcel_id,))
+
+
+class ObjectCache:
+    """In-memory policy-object lookup by parcel UUID, shared by report builders.
+
+    Served from the local index when it was synced from the same vManage
+    within max_age seconds, otherwise loaded once from vManage with concurrent
+    fetches of the requested parcel types.
+    """
+
+    def __init__(self, vm, types=None, index=None, max_age=INDEX_MAX_AGE):
+        self.vm = vm
+        self.types = types
+        self.index = index if index is not None else ObjectIndex.open_existing()
+        self.max_age = max_age
+        self.lock = threading.Lock()
+        self.parcels = None
+
+    def _load(self):
+        with self.lock:
+            if self.parcels is not None:
+                return
+            parcels = {}
+            stale = self.index.usable_for(self.vm.host, self.max_age) if self.index else "no local index"
+            if not stale:
+                for row in self.index.objects():
+                    if not self.types or row["parcel_type"] in self.types:
+                        parcels[row["parcel_id"]] = json.loads(row["payload"])
+                print(f"Policy objects: local index {self.index.path} ({len(parcels)} objects)")
+            else:
+                print(f"Policy objects: loading from vManage ({stale})")
+                for _, _, parcel in fetch_policy_objects(self.vm, types=self.types):
+                    parcels[parcel.get("parcelId", "")] = parcel
+            self.parcels = parcels
+
+    def get(self, parcel_id):
+        """Full parcel dict, or None if unknown."""
+        self._load()
+        return self.parcels.get(parcel_id)
+
+    def name(self, parcel_id):
+        parcel = self.get(parcel_id)
+        return parcel.get("payload", {}).get("name", parcel_id) if parcel else parcel_id
+
+    def data(self, parcel_id):
+        parcel = self.get(parcel_id)
+        return parcel.get("payload", {}).get("data", {}) if parcel else {}
@@ -0,0 +1,172 @@
+# picker.py
+import sys
+import threading
+
+import tabulate
+
+PAGE_SIZE = 20
+
+
+def fuzzy_score(query, text):
+    """Rank how well query matches text (both lower case); lower is better, None if no match.
+
+    Substring matches rank before scattered (subsequence) matches; earlier
+    and tighter matches rank first.
+    """
+    pos = text.find(query)
+    if pos >= 0:
+        return (0 if text == query else 1, pos, len(text))
+    start = end = -1
+    for ch in query:
+        end = text.find(ch, end + 1)
+        if end < 0:
+            return None
+        if start < 0:
+            start = end
+    return (2, end - start, len(text))
+
+
+class Picker:
+    """Numbered, paged, searchable selection menu shared by the interactive scripts.
+
+    Items can be added while the prompt is already shown: load() consumes an
+    iterable of item batches in a background thread. Each item's name and id
+    are lower-cased once into a search index; typing text filters the list
+    with fuzzy matching (a longer query only re-scans the previous matches),
+    a number selects by position, and pasting an exact id selects directly.
+    A leading '/' always searches, so "/n" or "/42" look for those strings.
+
+    Numbers are positions in load order and never change once shown; each
+    batch is sorted by name, so batches delivered in a fixed order give the
+    same numbering on every run.
+    """
+
+    def __init__(self, headers, row, name, ident, page_size=PAGE_SIZE, noun="items"):
+        self.headers = ["#"] + list(headers)
+        self.row = row
+        self.name = name
+        self.ident = ident
+        self.page_size = page_size
+        self.noun = noun
+        self.items = []
+        self.keys = []        # (name, id) lower-cased, parallel to items
+        self.by_id = {}       # lower-cased id -> position
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+        self.loaded.set()
+        self.error = None
+        self._last = None     # (query, items scanned, matching positions)
+
+    def add(self, items):
+        with self.lock:
+            for item in sorted(items, key=lambda i: str(self.name(i)).lower()):
+                key = (str(self.name(item)).lower(), str(self.ident(item)).lower())
+                self.by_id.setdefault(key[1], len(self.items))
+                self.items.append(item)
+                self.keys.append(key)
+
+    def load(self, batches):
+        """Add batches from an iterable in a background thread."""
+        self.loaded.clear()
+
+        def worker():
+            try:
+                for batch in batches:
+                    self.add(batch)
+            except Exception as e:
+                self.error = e
+            finally:
+                self.loaded.set()
+
+        threading.Thread(target=worker, daemon=True).start()
+        return self
+
+    def wait(self, timeout=None):
+        self.loaded.wait(timeout)
+        return self.items
+
+    def search(self, query):
+        """Positions of the items matching query, best matches first."""
+        query = query.lower()
+        with self.lock:
+            count = len(self.items)
+            keys = self.keys
+        if not query:
+            return list(range(count))
+
+        last = self._last
+        if last and last[0] and query.startswith(last[0]):
+            # same or longer query: only previous matches and newly loaded items can match
+            candidates = list(last[2]) + list(range(last[1], count))
+        else:
+            candidates = range(count)
+
+        scored = []
+        for pos in candidates:
+            scores = [s for s in (fuzzy_score(query, k) for k in keys[pos]) if s is not None]
+            if scores:
+                scored.append((min(scores), pos))
+        scored.sort()
+        matches = [pos for _, pos in scored]
+        self._last = (query, count, matches)
+        return matches
+
+    def _show(self, matches, page, query):
+        with self.lock:
+            total = len(self.items)
+        status = "" if self.loaded.is_set() else " (loading...)"
+        if self.error:
+            status += f" (load error: {self.error})"
+        pages = max(1, (len(matches) + self.page_size - 1) // self.page_size)
+        header = f"{total} {self.noun}{status}"
+        if query:
+            header += f", {len(matches)} matching '{query}'"
+        print(f"\n{header} - page {page + 1}/{pages}")
+        start = page * self.page_size
+        rows = [[pos + 1] + list(self.row(self.items[pos])) for pos in matches[start:start + self.page_size]]
+        if rows:
+            print(tabulate.tabulate(rows, self.headers, tablefmt="fancy_grid"))
+
+    def pick(self, prompt="Select a number"):
+        """Run the menu until an item is chosen. Returns the item, or None if
+        loading finished without any items; 'q' exits like the old menus.
+        If background loading failed before any item arrived, its exception
+        is raised here."""
+        if not self.items:
+            # give a fast first batch the chance to arrive before drawing
+            self.loaded.wait(0.5)
+
+        query, page = "", 0
+        while True:
+            if self.loaded.is_set() and not self.items:
+                if self.error is not None:
+                    raise self.error
+                return None
+            matches = self.search(query)
+            page = min(page, max(0, (len(matches) - 1) // self.page_size))
+            self._show(matches, page, query)
+
+            choice = input(f"{prompt} (text or /text to search, '*' to clear, n/p to page, Enter to refresh, "
+                           f"'q' to quit): ").strip()
+            if choice.startswith("/"):
+                query, page = choice[1:].strip(), 0
+            elif choice.lower() == "q":
+                sys.exit(0)
+            elif choice.lower() == "n":
+                page += 1
+            elif choice.lower() == "p":
+                page = max(0, page - 1)
+            elif choice == "*":
+                query, page = "", 0
+            elif choice.isdigit():
+                pos = int(choice) - 1
+                with self.lock:
+                    if 0 <= pos < len(self.items):
+                        return self.items[pos]
+                print("Invalid selection, try again.")
+            elif choice:
+                with self.lock:
+                    pos = self.by_id.get(choice.lower())
+                if pos is not None:
+                    return self.items[pos]
+                query, page = choice, 0
@@ -0,0 +1,232 @@
+# prefix_ingest.py
+import re
+from array import array
+
+# Default rule reproduces the original push-data-prefix.py behaviour:
+# every /16 gets two host routes, <a>.<b>.1.10/32 and <a>.<b>.1.11/32.
+DEFAULT_EXPANSION_RULES = [
+    {"prefixlen": 16, "hosts": ["0.0.1.10", "0.0.1.11"]},
+]
+
+_IPV4_RE = re.compile(r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.(\d{1,3})(?:/(\d{1,2}))?$")
+
+
+def _int_to_ip(value):
+    return f"{value >> 24 & 255}.{value >> 16 & 255}.{value >> 8 & 255}.{value & 255}"
+
+
+def _ip_to_int(text):
+    m = _IPV4_RE.match(text)
+    if not m or m.group(5) is not None:
+        raise ValueError(f"not an IPv4 address: {text}")
+    octets = [int(o) for o in m.groups()[:4]]
+    if any(o > 255 for o in octets):
+        raise ValueError(f"not an IPv4 address: {text}")
+    return octets[0] << 24 | octets[1] << 16 | octets[2] << 8 | octets[3]
+
+
+class PrefixBatch:
+    """A batch of IPv4 prefixes held as two parallel integer arrays.
+
+    Parsing, validation and normalisation work on the integer columns rather
+    than on ipaddress objects, so tens of thousands of CMDB lines are cheap.
+    """
+
+    def __init__(self):
+        self.networks = array("L")      # network address as uint32
+        self.lengths = array("B")       # prefix length 0..32
+        self.errors = []                # (line number, text, reason)
+
+    def __len__(self):
+        return len(self.networks)
+
+    @classmethod
+    def parse(cls, values, strict=False):
+        """Parse an iterable of strings ("10.1.0.0/16", "10.1.1.10", ...).
+
+        Host bits are masked off (10.1.2.3/16 -> 10.1.0.0/16) unless strict,
+        in which case such lines are rejected. Bare addresses become /32.
+        Invalid lines are collected in .errors instead of raising.
+        """
+        batch = cls()
+        networks, lengths, errors = batch.networks, batch.lengths, batch.errors
+        match = _IPV4_RE.match
+        for lineno, raw in enumerate(values, start=1):
+            text = raw.strip()
+            if not text or text.startswith("#"):
+                continue
+            m = match(text)
+            if not m:
+                errors.append((lineno, text, "not an IPv4 prefix"))
+                continue
+            a, b, c, d, plen = m.groups()
+            a, b, c, d = int(a), int(b), int(c), int(d)
+            plen = 32 if plen is None else int(plen)
+            if a > 255 or b > 255 or c > 255 or d > 255 or plen > 32:
+                errors.append((lineno, text, "octet or prefix length out of range"))
+                continue
+            addr = a << 24 | b << 16 | c << 8 | d
+            mask = (0xFFFFFFFF << (32 - plen)) & 0xFFFFFFFF
+            if addr & mask != addr:
+                if strict:
+                    errors.append((lineno, text, "host bits set"))
+                    continue
+                addr &= mask
+            networks.append(addr)
+            lengths.append(plen)
+        return batch
+
+    def prefixes(self):
+        """Yield normalised "a.b.c.d/len" strings."""
+        for addr, plen in zip(self.networks, self.lengths):
+            yield f"{_int_to_ip(addr)}/{plen}"
+
+    def unique(self):
+        """Return a new batch without duplicates, sorted by address then length."""
+        out = PrefixBatch()
+        for addr, plen in sorted(set(zip(self.networks, self.lengths))):
+            out.networks.append(addr)
+            out.lengths.append(plen)
+        out.errors = list(self.errors)
+        return out
+
+    def expand(self, rules=None):
+        """Apply expansion rules and return the generated host prefixes as a new batch.
+
+        Each rule is {"prefixlen": N, "hosts": ["0.0.1.10", ...]}: for every
+        prefix of length N, each host offset is added to the network address
+        and emitted as a /32. Offsets must fall inside the prefix.
+        """
+        rules = DEFAULT_EXPANSION_RULES if rules is None else rules
+        compiled = {}
+        for rule in rules:
+            plen = int(rule["prefixlen"])
+            size = 1 << (32 - plen)
+            offsets = []
+            for host in rule["hosts"]:
+                offset = _ip_to_int(host) if "." in str(host) else int(host)
+                if offset >= size:
+                    raise ValueError(f"offset {host} is outside a /{plen}")
+                offsets.append(offset)
+            compiled.setdefault(plen, []).extend(offsets)
+
+        out = PrefixBatch()
+        for addr, plen in zip(self.networks, self.lengths):
+            for offset in compiled.get(plen, ()):
+                out.networks.append(addr + offset)
+                out.lengths.append(32)
+        return out
+
+
+PREFIX_COLUMNS = ("prefix", "ipprefix", "ip prefix", "ip_prefix", "network", "subnet", "value")
+
+
+def _json_entries(data):
+    """The entry list of a JSON prefix file: a bare list, {"entries": [...]} or a
+    parcel ({"payload": {"data": {"entries": [...]}}}, with or without "payload")."""
+    if isinstance(data, list):
+        return data
+    if not isinstance(data, dict):
+        raise ValueError(f"expected a list or an object, got {type(data).__name__}")
+    node = data.get("payload", data)
+    if isinstance(node, dict) and "data" in node:
+        node = node["data"]
+    entries = node.get("entries") if isinstance(node, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError('no "entries" list found')
+    return entries
+
+
+def iter_prefix_file(path):
+    """Stream prefix strings from a .txt, .csv or .json file.
+
+    TXT: first comma/space separated field per line ('#' comments allowed).
+    CSV: the column named prefix/ipPrefix/network/... if there is a header,
+    otherwise the first column. JSON: a list of strings or of
+    {"ipPrefix": {"value": ...}} entries, optionally under "entries" or a
+    full parcel payload (JSON is read whole; the others line by line).
+    """
+    if path.lower().endswith(".json"):
+        import json
+        with open(path) as f:
+            data = json.load(f)
+        for item in _json_entries(data):
+            if isinstance(item, dict):
+                node = item.get("ipPrefix", "")
+                yield str(node.get("value", "") if isinstance(node, dict) else node)
+            else:
+                yield str(item)
+        return
+
+    if path.lower().endswith(".csv"):
+        import csv
+        with open(path, newline="") as f:
+            reader = csv.reader(f)
+            first = next(reader, None)
+            if first is None:
+                return
+            names = [c.strip().lower() for c in first]
+            column = next((names.index(c) for c in PREFIX_COLUMNS if c in names), None)
+            if column is None:
+                column = 0
+                yield first[0] if first else ""
+            try:
+                for row in reader:
+                    yield row[column] if len(row) > column else ""
+            except csv.Error as e:
+                raise ValueError(f"line {reader.line_num}: {e}") from e
+        return
+
+    with open(path) as f:
+        for line in f:
+            yield re.split(r"[,;\s]", line.strip(), maxsplit=1)[0].strip('"')
+
+
+def write_prefix_file(path, entries):
+    """Export security-data-ip-prefix entries to .csv, .json or plain text."""
+    lower = path.lower()
+    if lower.endswith(".json"):
+        import json
+        with open(path, "w") as f:
+            json.dump({"entries": entries}, f, indent=2)
+    elif lower.endswith(".csv"):
+        import csv
+        with open(path, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["IP Prefix", "Option Type"])
+            for e in entries:
+                writer.writerow([e["ipPrefix"]["value"], e["ipPrefix"].get("optionType", "global")])
+    else:
+        with open(path, "w") as f:
+            for e in entries:
+                f.write(e["ipPrefix"]["value"] + "\n")
+
+
+def to_entries(prefixes, option_type="global"):
+    """Wrap prefix strings as security-data-ip-prefix entries."""
+    return [{"ipPrefix": {"optionType": option_type, "value": p}} for p in prefixes]
+
+
+def normalize_prefix(text, strict=False):
+    """Validate and normalise a single prefix; raises ValueError with the reason."""
+    batch = PrefixBatch.parse([text], strict=strict)
+    if batch.errors:
+        raise ValueError(f"{text}: {batch.errors[0][2]}")
+    if not len(batch):
+        raise ValueError("empty prefix")
+    return next(batch.prefixes())
+
+
+def load_expansion_rules(path):
+    """Read expansion rules from a JSON or YAML file (list of {prefixlen, hosts})."""
+    with open(path) as f:
+        text = f.read()
+    if path.endswith((".yml", ".yaml")):
+        import yaml
+        rules = yaml.safe_load(text)
+    else:
+        import json
+        rules = json.loads(text)
+    if not isinstance(rules, list) or not all("prefixlen" in r and "hosts" in r for r in rules):
+        raise ValueError(f"{path}: expected a list of {{prefixlen, hosts}} rules")
+    return rules
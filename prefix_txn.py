@@ -0,0 +1,166 @@
+# prefix_txn.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import tabulate
+
+PREFIX_PARCEL_PATH = "/v1/feature-profile/sdwan/policy-object/{profile_id}/security-data-ip-prefix/{parcel_id}"
+
+
+class TransactionError(Exception):
+    """Raised when a prefix transaction did not commit; carries the TxnResult."""
+
+    def __init__(self, result):
+        super().__init__(result.summary())
+        self.result = result
+
+
+class ParcelChange:
+    """State and timings of one parcel within a transaction."""
+
+    def __init__(self, profile_id, parcel_id, name, entries):
+        self.profile_id = profile_id
+        self.parcel_id = parcel_id
+        self.name = name
+        self.entries = entries
+        self.path = PREFIX_PARCEL_PATH.format(profile_id=profile_id, parcel_id=parcel_id)
+        self.before = None        # parcel as read before the change
+        self.response = None
+        self.state = "pending"    # pending/applied/committed/failed/rolled_back/rollback_failed/untouched
+        self.error = None
+        self.timings = {}         # phase -> seconds
+
+    def as_row(self):
+        t = self.timings
+        return [self.name, self.parcel_id, self.state,
+                *(f"{t[p]:.2f}" if p in t else "-" for p in ("snapshot", "apply", "verify", "rollback")),
+                self.error or "-"]
+
+
+ROW_HEADERS = ["Object", "Parcel ID", "State", "Snapshot (s)", "Apply (s)", "Verify (s)", "Rollback (s)", "Error"]
+
+
+class TxnResult:
+    def __init__(self, changes):
+        self.changes = changes
+        self.ok = False
+        self.started = time.time()
+        self.finished = None
+
+    def rows(self):
+        return [c.as_row() for c in self.changes]
+
+    def summary(self):
+        states = {}
+        for c in self.changes:
+            states[c.state] = states.get(c.state, 0) + 1
+        text = ", ".join(f"{n} {s}" for s, n in sorted(states.items()))
+        return f"{'committed' if self.ok else 'not committed'}: {text}"
+
+
+def _entry_values(entries):
+    return sorted(e.get("ipPrefix", {}).get("value", "") for e in entries)
+
+
+class PrefixTransaction:
+    """Apply several security-data-ip-prefix updates all-or-nothing.
+
+    commit() reads every target parcel first, PUTs all changes concurrently,
+    re-reads them to verify, and if any step fails restores every parcel that
+    was already changed from its snapshot.
+    """
+
+    def __init__(self, vm, max_workers=None):
+        self.vm = vm
+        self.max_workers = max_workers
+        self.changes = {}
+
+    def add(self, profile_id, parcel_id, name, entries):
+        self.changes[parcel_id] = ParcelChange(profile_id, parcel_id, name, entries)
+
+    def _parallel(self, func, changes):
+        workers = min(self.max_workers or self.vm.concurrency.maximum, len(changes)) or 1
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(func, changes))
+
+    def _timed(self, change, phase, func):
+        started = time.time()
+        try:
+            return func()
+        finally:
+            change.timings[phase] = time.time() - started
+
+    def _snapshot(self, change):
+        try:
+            change.before = self._timed(change, "snapshot", lambda: self.vm.get(change.path))
+        except Exception as e:
+            change.state, change.error = "failed", f"snapshot: {e}"
+
+    def _apply(self, change):
+        payload = {"name": change.name, "data": {"entries": change.entries}}
+        try:
+            change.response = self._timed(
+                change, "apply", lambda: self.vm.put(change.path, payload, raise_errors=True))
+            change.state = "applied"
+        except Exception as e:
+            # the PUT may have partly landed; roll it back too
+            change.state, change.error = "failed", f"apply: {e}"
+
+    def _verify(self, change):
+        try:
+            current = self._timed(change, "verify", lambda: self.vm.get(change.path))
+            got = _entry_values(current.get("payload", {}).get("data", {}).get("entries", []))
+            if got != _entry_values(change.entries):
+                change.state, change.error = "failed", "verify: entries differ from what was sent"
+        except Exception as e:
+            change.state, change.error = "failed", f"verify: {e}"
+
+    def _rollback(self, change):
+        before = change.before.get("payload", {})
+        payload = {"name": before.get("name", change.name), "data": before.get("data", {})}
+        if before.get("description"):
+            payload["description"] = before["description"]
+        try:
+            self._timed(change, "rollback", lambda: self.vm.put(change.path, payload, raise_errors=True))
+            change.state = "rolled_back"
+        except Exception as e:
+            change.state = "rollback_failed"
+            change.error = f"{change.error}; rollback: {e}" if change.error else f"rollback: {e}"
+
+    def commit(self):
+        """Run the transaction. Returns a TxnResult; raises TransactionError if not committed."""
+        changes = list(self.changes.values())
+        result = TxnResult(changes)
+
+        # 1. snapshot: if any read fails nothing has been changed yet
+        self._parallel(self._snapshot, changes)
+        if any(c.state == "failed" for c in changes):
+            for c in changes:
+                if c.state == "pending":
+                    c.state = "untouched"
+            result.finished = time.time()
+            raise TransactionError(result)
+
+        # 2. apply and 3. verify
+        self._parallel(self._apply, changes)
+        self._parallel(self._verify, [c for c in changes if c.state == "applied"])
+
+        if all(c.state == "applied" for c in changes):
+            for c in changes:
+                c.state = "committed"
+            result.ok = True
+            result.finished = time.time()
+            self.changes = {}
+            return result
+
+        # 4. rollback everything that was (or may have been) written
+        self._parallel(self._rollback, [c for c in changes if c.before is not None])
+        result.finished = time.time()
+        raise TransactionError(result)
+
+
+def print_transaction(result):
+    """Print the per-parcel state and phase timings of a transaction."""
+    elapsed = (result.finished or time.time()) - result.started
+    print(f"\n=== Prefix update {result.summary()} ({elapsed:.2f}s) ===")
+    print(tabulate.tabulate(result.rows(), headers=ROW_HEADERS, tablefmt="fancy_grid"))
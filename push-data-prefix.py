@@ -1,9 +1,25 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
-import json
+from deploy_batch import DeployBatch, confirm_and_deploy
+from prefix_txn import TransactionError, print_transaction
+from prefix_ingest import PrefixBatch, iter_prefix_file, load_expansion_rules, to_entries
+import argparse
 import sys
 import tabulate
-import ipaddress
+
+# Default list (only prefixes matching an expansion rule, /16 by default, are expanded)
+GIVEN_LIST = [
+    "10.32.0.0/16", "10.23.0.0/16", "10.26.0.0/16", "10.14.0.0/16",
+    "10.38.0.0/16", "10.13.0.0/16", "10.40.0.0/16", "10.15.0.0/16",
+    "10.33.0.0/16", "10.34.0.0/16", "10.16.0.0/16", "10.37.0.0/16",
+    "10.6.0.0/16", "10.4.0.0/16", "10.11.0.0/16", "10.18.0.0/16",
+    "10.29.0.0/16", "10.7.0.0/16", "10.41.0.0/16", "10.19.0.0/16",
+    "10.46.0.0/16", "10.5.0.0/16", "10.20.0.0/16", "10.22.0.0/16",
+    "10.42.0.0/16", "10.9.0.0/16", "10.3.0.0/16", "10.10.0.0/16",
+    "10.21.0.0/16", "10.45.0.0/16"
+]
+
+PREVIEW_LIMIT = 100
 
 def list_policy_object_profiles(vm):
     """Return all policy-object profiles."""
@@ -37,18 +53,12 @@ def build_prefix_menu(vm, profiles):
             counter += 1
     return menu_items
 
-def expand_only_16_subnets(ip_list):
-    """Expand only /16 subnets into .1.10/32 and .1.11/32."""
-    generated_entries = []
-    for ip_str in ip_list:
-        net = ipaddress.ip_network(ip_str, strict=False)
-        if net.prefixlen == 16:
-            octets = ip_str.split(".")
-            host1 = f"{octets[0]}.{octets[1]}.1.10/32"
-            host2 = f"{octets[0]}.{octets[1]}.1.11/32"
-            generated_entries.append({"ipPrefix": {"optionType": "global", "value": host1}})
-            generated_entries.append({"ipPrefix": {"optionType": "global", "value": host2}})
-    return generated_entries
+def expand_prefixes(ip_list, rules=None):
+    """Validate ip_list in one batch and expand it with the given rules
+    (default: each /16 -> .1.10/32 and .1.11/32). Returns (entries, errors)."""
+    batch = PrefixBatch.parse(ip_list).unique()
+    expanded = batch.expand(rules).unique()
+    return to_entries(expanded.prefixes()), batch.errors
 
 def merge_entries_unique(existing_entries, new_entries):
     """Merge entries avoiding duplicates."""
@@ -60,21 +70,8 @@ def merge_entries_unique(existing_entries, new_entries):
             existing_values.add(entry["ipPrefix"]["value"])
     return merged
 
-def push_update(vm, profile_id, parcel_id, prefix_name, entries):
-    updated_payload = {
-        "name": prefix_name,
-        "data": {
-            "entries": entries
-        }
-    }
-    resp = vm.put(f"/v1/feature-profile/sdwan/policy-object/{profile_id}/security-data-ip-prefix/{parcel_id}", updated_payload)
-    return resp
-
-def main():
-    # Login
-    host, user, pwd = load_vmanage_creds()
-    vm = VManage(host, user, pwd)
-
+def run(vm, given_list=None, rules=None):
+    """Expand the prefix list into grp_Data_Server_for_PCI_Access and push it."""
     # Find grp_Data_Server_for_PCI_Access
     profiles = list_policy_object_profiles(vm)
     menu_items = build_prefix_menu(vm, profiles)
@@ -86,29 +83,26 @@ def main():
     payload = target["full_entry"].get("payload", {})
     existing_entries = payload.get("data", {}).get("entries", [])
 
-    # Your tweaked list (only /16 entries will be expanded)
-    given_list = [
-        "10.32.0.0/16", "10.23.0.0/16", "10.26.0.0/16", "10.14.0.0/16",
-        "10.38.0.0/16", "10.13.0.0/16", "10.40.0.0/16", "10.15.0.0/16",
-        "10.33.0.0/16", "10.34.0.0/16", "10.16.0.0/16", "10.37.0.0/16",
-        "10.6.0.0/16", "10.4.0.0/16", "10.11.0.0/16", "10.18.0.0/16",
-        "10.29.0.0/16", "10.7.0.0/16", "10.41.0.0/16", "10.19.0.0/16",
-        "10.46.0.0/16", "10.5.0.0/16", "10.20.0.0/16", "10.22.0.0/16",
-        "10.42.0.0/16", "10.9.0.0/16", "10.3.0.0/16", "10.10.0.0/16",
-        "10.21.0.0/16", "10.45.0.0/16"
-    ]
-
-    # Generate expansions (only /16s)
-    new_entries = expand_only_16_subnets(given_list)
+    # Generate expansions
+    new_entries, errors = expand_prefixes(GIVEN_LIST if given_list is None else given_list, rules)
+    if errors:
+        print(f"\nSkipped {len(errors)} invalid input line(s):")
+        print(tabulate.tabulate(errors[:PREVIEW_LIMIT], headers=["Line", "Input", "Reason"], tablefmt="fancy_grid"))
 
     # Merge with duplicate check
     updated_entries = merge_entries_unique(existing_entries, new_entries)
 
     # Preview before push
     headers = ["IP Prefix", "Option Type"]
-    rows = [(e["ipPrefix"]["value"], e["ipPrefix"]["optionType"]) for e in updated_entries]
-    print("\n=== Updated entries preview ===")
-    print(tabulate.tabulate(rows, headers=headers, tablefmt="fancy_grid"))
+    added = updated_entries[len(existing_entries):]
+    rows = [(e["ipPrefix"]["value"], e["ipPrefix"]["optionType"]) for e in added]
+    print(f"\n=== Entries to add ({len(added)} new, {len(existing_entries)} existing) ===")
+    print(tabulate.tabulate(rows[:PREVIEW_LIMIT], headers=headers, tablefmt="fancy_grid"))
+    if len(rows) > PREVIEW_LIMIT:
+        print(f"... and {len(rows) - PREVIEW_LIMIT} more")
+    if not added:
+        print("Nothing to add.")
+        return
 
     confirm = input("Confirm push to vManage? (y/n): ").strip().lower()
     if confirm != "y":
@@ -116,9 +110,13 @@ def main():
         sys.exit(0)
 
     # Push update
-    resp = push_update(vm, target["profile_id"], target["parcel_id"], "grp_Data_Server_for_PCI_Access", updated_entries)
-    print("\nPush result:")
-    print(json.dumps(resp, indent=2))
+    batch = DeployBatch(vm)
+    batch.stage(target["profile_id"], target["parcel_id"], "grp_Data_Server_for_PCI_Access", updated_entries)
+    try:
+        print_transaction(batch.push())
+    except TransactionError as e:
+        print_transaction(e.result)
+        sys.exit(1)
 
     # Verify
     updated_obj = vm.get(f"/v1/feature-profile/sdwan/policy-object/{target['profile_id']}/security-data-ip-prefix/{target['parcel_id']}")
@@ -128,5 +126,22 @@ def main():
     confirm_rows = [(e["ipPrefix"]["value"], e["ipPrefix"]["optionType"]) for e in entries]
     print(tabulate.tabulate(confirm_rows, headers=headers, tablefmt="fancy_grid"))
 
+    # Deploy affected policy groups once
+    confirm_and_deploy(batch)
+
+def main():
+    parser = argparse.ArgumentParser(description="Expand prefixes into grp_Data_Server_for_PCI_Access.")
+    parser.add_argument("--file", help="prefix list, one per line (CSV: first column); default: built-in list")
+    parser.add_argument("--rules", help="JSON/YAML expansion rules, e.g. [{\"prefixlen\": 16, \"hosts\": [\"0.0.1.10\"]}]")
+    args = parser.parse_args()
+
+    given_list = iter_prefix_file(args.file) if args.file else None
+    rules = load_expansion_rules(args.rules) if args.rules else None
+
+    # Login
+    host, user, pwd = load_vmanage_creds()
+    vm = VManage(host, user, pwd)
+    run(vm, given_list, rules)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,82 @@
+# rate_limit.py
+import time
+import threading
+
+
+class TokenBucket:
+    """Classic token bucket: `rate` requests per second with bursts up to `burst`."""
+
+    def __init__(self, rate, burst=None):
+        self.rate = float(rate)
+        self.capacity = float(burst or max(1, rate))
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available."""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class AdaptiveLimiter:
+    """AIMD concurrency limit for in-flight requests.
+
+    The limit grows by one after `limit` consecutive healthy responses
+    (roughly one step per round of requests) and is halved on 429, 5xx or a
+    slow response. "Slow" is relative to the endpoint: each key passed to
+    release() keeps a moving average of its latency, and a response counts
+    as slow when it takes more than `slow_factor` times that baseline (and
+    at least `slow_after` seconds), so per-device real-time queries that are
+    always slow do not throttle everything else.
+    """
+
+    def __init__(self, initial=4, minimum=1, maximum=32, slow_after=2.0, slow_factor=3.0, smoothing=0.2):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.slow_after = slow_after
+        self.slow_factor = slow_factor
+        self.smoothing = smoothing
+        self.baseline = {}      # endpoint key -> moving average latency (s)
+        self.in_flight = 0
+        self.healthy = 0
+        self.cond = threading.Condition()
+
+    def acquire(self):
+        with self.cond:
+            while self.in_flight >= int(self.limit):
+                self.cond.wait()
+            self.in_flight += 1
+
+    def _slow(self, key, latency):
+        """Compare latency with the key's baseline, then fold it into the baseline."""
+        baseline = self.baseline.get(key)
+        if baseline is None:
+            self.baseline[key] = latency
+            return False
+        self.baseline[key] = baseline + self.smoothing * (latency - baseline)
+        return latency > max(self.slow_after, self.slow_factor * baseline)
+
+    def release(self, status=None, latency=0.0, key=None):
+        with self.cond:
+            self.in_flight -= 1
+            failed = status is None or status == 429 or status >= 500
+            overloaded = failed or self._slow(key, latency)
+            if overloaded:
+                self.limit = max(self.minimum, self.limit / 2)
+                self.healthy = 0
+            else:
+                self.healthy += 1
+                if self.healthy >= int(self.limit):
+                    self.limit = min(self.maximum, self.limit + 1)
+                    self.healthy = 0
+            self.cond.notify_all()
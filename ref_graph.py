@@ -0,0 +1,292 @@
+# ref_graph.py
+import os
+import json
+import sqlite3
+import threading
+import time
+
+from object_index import INDEX_FILE, _as_list
+
+# Feature profile types whose parcels reference policy objects
+PROFILE_TYPES = ["embedded-security", "application-priority"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS graph_nodes (
+    id    TEXT PRIMARY KEY,
+    kind  TEXT,
+    name  TEXT,
+    stamp INTEGER
+);
+CREATE TABLE IF NOT EXISTS graph_edges (
+    src    TEXT,
+    dst    TEXT,
+    via    TEXT,
+    detail TEXT,
+    owner  TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_edges_src ON graph_edges(src);
+CREATE INDEX IF NOT EXISTS idx_edges_owner ON graph_edges(owner);
+CREATE TABLE IF NOT EXISTS meta (
+    key   TEXT PRIMARY KEY,
+    value TEXT
+);
+"""
+
+# Levels walked by impact(), from the object outwards
+LEVELS = ["parcel", "profile", "policy-group", "device"]
+
+
+def find_refs(node, field=None, sequence=""):
+    """Yield (ref_id, field, sequence_name) for every refId inside a parcel payload."""
+    if isinstance(node, dict):
+        if "sequenceName" in node:
+            sequence = node["sequenceName"].get("value", "") if isinstance(
+                node["sequenceName"], dict) else str(node["sequenceName"])
+        for k, v in node.items():
+            if k == "refId" and isinstance(v, dict):
+                value = v.get("value")
+                for ref in value if isinstance(value, list) else [value]:
+                    if ref:
+                        yield ref, field, sequence
+            else:
+                yield from find_refs(v, k, sequence)
+    elif isinstance(node, list):
+        for item in node:
+            yield from find_refs(item, field, sequence)
+
+
+def _walk_parcels(parcels):
+    """Flatten associatedProfileParcels and their subparcels."""
+    for parcel in parcels:
+        yield parcel
+        yield from _walk_parcels(parcel.get("subparcels", []))
+
+
+class RefGraph:
+    """Reverse-reference graph: object -> parcels -> profiles -> policy groups -> devices.
+
+    Stored next to the object index so impact queries run offline.
+    """
+
+    def __init__(self, path=INDEX_FILE):
+        self.path = path
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.row_factory = sqlite3.Row
+        self.db.executescript(SCHEMA)
+        self.lock = threading.Lock()
+
+    @classmethod
+    def open_existing(cls, path=INDEX_FILE, host=None):
+        """Return the graph if it has been built before (from `host`, if given), or None."""
+        if not os.path.isfile(path):
+            return None
+        graph = cls(path)
+        if not graph.refreshed_at() or (host is not None and graph.synced_host() != host):
+            graph.close()
+            return None
+        return graph
+
+    def close(self):
+        self.db.close()
+
+    def _meta(self, key, default=None):
+        with self.lock:
+            row = self.db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def refreshed_at(self):
+        value = self._meta("graph_refreshed")
+        return float(value) if value else None
+
+    def synced_host(self):
+        """vManage host the graph was built from."""
+        return self._meta("graph_host")
+
+    def failures(self):
+        """Items the last refresh could not read; the graph may be incomplete for them."""
+        return json.loads(self._meta("graph_failed", "[]"))
+
+    # --- build ---
+
+    def _stamps(self, kind):
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT id, stamp FROM graph_nodes WHERE kind = ?", (kind,)).fetchall()
+        return {r["id"]: r["stamp"] for r in rows}
+
+    def _replace_owner(self, owner, nodes, edges):
+        """Drop everything previously produced by owner and insert the new rows."""
+        self.db.execute("DELETE FROM graph_edges WHERE owner = ?", (owner,))
+        self.db.executemany("INSERT OR REPLACE INTO graph_nodes VALUES (?, ?, ?, ?)", nodes)
+        self.db.executemany(
+            "INSERT INTO graph_edges VALUES (?, ?, ?, ?, ?)",
+            [e + (owner,) for e in edges],
+        )
+
+    def _drop_owner(self, owner):
+        self.db.execute("DELETE FROM graph_edges WHERE owner = ?", (owner,))
+        self.db.execute("DELETE FROM graph_nodes WHERE id = ?", (owner,))
+
+    def _prune_nodes(self):
+        """Remove parcel and device nodes that no edge refers to any more."""
+        self.db.execute(
+            "DELETE FROM graph_nodes WHERE kind IN ('parcel', 'device') "
+            "AND id NOT IN (SELECT src FROM graph_edges) AND id NOT IN (SELECT dst FROM graph_edges)")
+
+    def refresh(self, vm, full=False, max_workers=None):
+        """Fetch changed profiles and policy groups concurrently and update the graph.
+
+        Profiles and policy groups whose lastUpdatedOn is unchanged are skipped
+        unless full=True. Device associations are always re-read. A graph
+        built from another vManage is rebuilt from scratch. Items that could
+        not be read are listed in stats["failed"] and kept in meta, so impact
+        output can warn that it may be incomplete.
+        """
+        stats = {"profiles": 0, "policy_groups": 0, "skipped": 0, "removed": 0, "failed": []}
+
+        if self.synced_host() != vm.host:
+            full = True
+            with self.lock, self.db:
+                self.db.execute("DELETE FROM graph_edges")
+                self.db.execute("DELETE FROM graph_nodes")
+
+        # 1. Profile lists (one call per type)
+        lists = vm.get_many([f"/v1/feature-profile/sdwan/{t}" for t in PROFILE_TYPES],
+                            max_workers=max_workers)
+        known = self._stamps("profile")
+        current, to_fetch = {}, {}
+        for t in PROFILE_TYPES:
+            resp = lists[f"/v1/feature-profile/sdwan/{t}"]
+            if isinstance(resp, Exception):
+                raise resp
+            for p in _as_list(resp):
+                pid = p.get("profileId", "")
+                current[pid] = p
+                if full or known.get(pid) != p.get("lastUpdatedOn"):
+                    to_fetch[f"/v1/feature-profile/sdwan/{t}/{pid}"] = p
+
+        # 2. Policy group list
+        groups = _as_list(vm.get("/v1/policy-group"))
+        known_groups = self._stamps("policy-group")
+        group_paths = {}
+        for g in groups:
+            gid = g.get("id", "")
+            if full or known_groups.get(gid) != g.get("lastUpdatedOn"):
+                group_paths[f"/v1/policy-group/{gid}"] = g
+
+        # 3. Details for changed items plus all device associations, concurrently
+        assoc_paths = {f"/v1/policy-group/{g.get('id', '')}/device/associate": g for g in groups}
+        results = vm.get_many(list(to_fetch) + list(group_paths) + list(assoc_paths),
+                              max_workers=max_workers)
+
+        with self.lock, self.db:
+            for path, summary in to_fetch.items():
+                detail = results[path]
+                if isinstance(detail, Exception):
+                    stats["failed"].append(f"profile {summary.get('profileName', path)}: {detail}")
+                    continue
+                pid = summary.get("profileId", "")
+                nodes = [(pid, "profile", summary.get("profileName", ""), summary.get("lastUpdatedOn"))]
+                edges = []
+                for parcel in _walk_parcels(detail.get("associatedProfileParcels", [])):
+                    parcel_id = parcel.get("parcelId", "")
+                    nodes.append((parcel_id, "parcel", parcel.get("payload", {}).get("name", ""),
+                                  parcel.get("lastUpdatedOn")))
+                    edges.append((parcel_id, pid, "profile", parcel.get("parcelType", "")))
+                    for ref, field, sequence in find_refs(parcel.get("payload", {})):
+                        edges.append((ref, parcel_id, field or "", sequence))
+                self._replace_owner(pid, nodes, edges)
+                stats["profiles"] += 1
+
+            for path, summary in group_paths.items():
+                detail = results[path]
+                if isinstance(detail, Exception):
+                    stats["failed"].append(f"policy group {summary.get('name', path)}: {detail}")
+                    continue
+                gid = summary.get("id", "")
+                nodes = [(gid, "policy-group", summary.get("name", ""), summary.get("lastUpdatedOn"))]
+                edges = [(p.get("id", ""), gid, "policy-group", p.get("type", ""))
+                         for p in detail.get("profiles", [])]
+                self._replace_owner(gid, nodes, edges)
+                stats["policy_groups"] += 1
+
+            for path, summary in assoc_paths.items():
+                devices = results[path]
+                if isinstance(devices, Exception):
+                    stats["failed"].append(f"devices of {summary.get('name', path)}: {devices}")
+                    continue
+                gid = summary.get("id", "")
+                nodes, edges = [], []
+                for dev in _as_list(devices):
+                    dev_id = dev.get("id") or dev.get("uuid") or dev.get("system-ip", "")
+                    label = dev.get("host-name") or dev.get("system-ip") or dev_id
+                    nodes.append((dev_id, "device", label, None))
+                    edges.append((gid, dev_id, "device", dev.get("system-ip", "")))
+                self._replace_owner(f"{gid}/devices", nodes, edges)
+
+            # forget profiles and groups that no longer exist
+            for pid in set(known) - set(current):
+                self._drop_owner(pid)
+                stats["removed"] += 1
+            live_groups = {g.get("id", "") for g in groups}
+            for gid in set(known_groups) - live_groups:
+                self._drop_owner(gid)
+                self._drop_owner(f"{gid}/devices")
+                stats["removed"] += 1
+
+            self._prune_nodes()
+            stats["skipped"] = len(current) - len(to_fetch) + len(groups) - len(group_paths)
+            self.db.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", [
+                ("graph_refreshed", str(time.time())),
+                ("graph_host", vm.host),
+                ("graph_failed", json.dumps(stats["failed"])),
+            ])
+        return stats
+
+    # --- queries ---
+
+    def node(self, node_id):
+        with self.lock:
+            row = self.db.execute("SELECT * FROM graph_nodes WHERE id = ?", (node_id,)).fetchone()
+        return dict(row) if row else {"id": node_id, "kind": "", "name": node_id}
+
+    def used_by(self, node_id):
+        """Direct referrers of node_id."""
+        with self.lock:
+            rows = self.db.execute(
+                "SELECT e.dst, e.via, e.detail, n.kind, n.name FROM graph_edges e "
+                "LEFT JOIN graph_nodes n ON n.id = e.dst WHERE e.src = ?", (node_id,)).fetchall()
+        return [dict(r) for r in rows]
+
+    def impact(self, node_id):
+        """Walk referrers outwards and group everything reached by level.
+
+        Returns {"parcel": [...], "profile": [...], "policy-group": [...], "device": [...]}
+        where each item is a dict with id, name, the referencing field ("via")
+        and details such as NGFW sequence names or device system-ips.
+        """
+        result = {level: {} for level in LEVELS}
+        frontier, seen = [node_id], {node_id}
+        while frontier:
+            nxt = []
+            for src in frontier:
+                for edge in self.used_by(src):
+                    dst = edge["dst"]
+                    kind = edge["kind"] or edge["via"]
+                    if kind in result:
+                        item = result[kind].setdefault(dst, {
+                            "id": dst,
+                            "name": edge["name"] or dst,
+                            "via": edge["via"],
+                            "details": [],
+                            "from": src,
+                        })
+                        if edge["detail"] and edge["detail"] not in item["details"]:
+                            item["details"].append(edge["detail"])
+                    if dst not in seen:
+                        seen.add(dst)
+                        nxt.append(dst)
+            frontier = nxt
+        return {level: list(items.values()) for level, items in result.items()}
@@ -0,0 +1,44 @@
+# sdwan.py - single entry point for all scripts
+import sys
+import argparse
+
+from commands import COMMANDS
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Run one or more vManage commands with a single login.",
+        epilog="commands:\n" + "\n".join(f"  {n:20} {d}" for n, (_, d) in COMMANDS.items()),
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("commands", nargs="+", metavar="command", choices=list(COMMANDS),
+                        help="commands to run in order, e.g. get-device control-status")
+    parser.add_argument("--creds", nargs=3, metavar=("HOST", "USER", "PASSWORD"),
+                        help="use these instead of the vault file")
+    parser.add_argument("--env", help="vault environment to use")
+    args = parser.parse_args()
+
+    # heavy imports (requests, yaml, tabulate) happen only once a command runs
+    from vmanage_api import VManage
+    from commands import load_command
+
+    if args.creds:
+        host, user, pwd = args.creds
+    else:
+        from creds_loader import load_vmanage_creds
+        host, user, pwd = load_vmanage_creds(args.env)
+    vm = VManage(host, user, pwd)
+
+    for name in args.commands:
+        if len(args.commands) > 1:
+            print(f"\n########## {name} ##########")
+        try:
+            load_command(name).run(vm)
+        except SystemExit as e:
+            # 'q' in an interactive picker ends that command only
+            if e.code not in (None, 0):
+                sys.exit(e.code)
+
+
+if __name__ == "__main__":
+    main()
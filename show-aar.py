@@ -1,5 +1,9 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
+from object_index import ObjectCache
+from picker import Picker
+import argparse
+import csv
 import sys
 import json
 import tabulate
@@ -26,31 +30,18 @@ def list_aar_policies(vm):
     return policies
 
 def pick_aar_policy(policies):
-    headers = ["#", "Profile Name", "Description", "Parcel Count", "Last Updated By", "Last Updated", "Ref Count"]
-    table = []
-
-    for idx, p in enumerate(policies, start=1):
-        table.append([
-            idx,
-            p.get("profileName", ""),
-            p.get("description", ""),
-            p.get("profileParcelCount", ""),
-            p.get("lastUpdatedBy", ""),
-            ms_to_date(p.get("lastUpdatedOn", "")),
-            p.get("referenceCount", "")
-        ])
-
-    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
-
-    while True:
-        choice = input("Select a policy number to expand (or 'q' to quit): ").strip()
-        if choice.lower() == "q":
-            sys.exit(0)
-        if choice.isdigit():
-            choice = int(choice)
-            if 1 <= choice <= len(policies):
-                return policies[choice - 1]  # return full policy object
-        print("Invalid selection, try again.")
+    picker = Picker(["Profile Name", "Description", "Parcel Count", "Last Updated By", "Last Updated", "Ref Count"],
+                    row=lambda p: [p.get("profileName", ""), p.get("description", ""), p.get("profileParcelCount", ""),
+                                   p.get("lastUpdatedBy", ""), ms_to_date(p.get("lastUpdatedOn", "")),
+                                   p.get("referenceCount", "")],
+                    name=lambda p: p.get("profileName", ""), ident=lambda p: p.get("profileId", ""),
+                    noun="AAR policies")
+    picker.add(policies)
+    selected = picker.pick("Select a policy number to expand")
+    if not selected:
+        print("No application-priority policies found.")
+        sys.exit(0)
+    return selected  # return full policy object
 
 def expand_aar_policy(vm, policy):
     """Fetch and display parcels/subparcels in table format."""
@@ -101,14 +92,174 @@ def expand_aar_policy(vm, policy):
     print("\n=== Associated Parcels for Policy ===")
     print(tabulate.tabulate(table, headers=headers, tablefmt="fancy_grid"))
 
-def main():
-    if len(sys.argv) >= 4:
-        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
-    else:
-        host, user, pwd = load_vmanage_creds()
+# Policy-object types referenced from AAR traffic policies
+AAR_OBJECT_TYPES = ["app-list", "sla-class", "app-probe", "preferred-color-group",
+                    "data-prefix", "data-ipv6-prefix", "color", "tloc", "policer"]
 
-    vm = VManage(host, user, pwd)
+REPORT_HEADERS = [
+    "Profile", "Policy", "Target", "Seq", "Sequence Name", "Base Action",
+    "App List", "Other Match", "SLA Class", "SLA (loss/latency/jitter)",
+    "Preferred Color", "Strict", "Fallback", "Other Actions",
+]
+
+def _val(node, default=""):
+    """Unwrap {"optionType": ..., "value": ...}."""
+    if isinstance(node, dict):
+        return node.get("value", default)
+    return default if node is None else node
+
+def _ref(node):
+    """refId value (first element if a list) from a match/action field."""
+    ref = _val(node.get("refId", {})) if isinstance(node, dict) else ""
+    return ref[0] if isinstance(ref, list) and ref else ref
+
+def _join(value):
+    return ", ".join(str(v) for v in value) if isinstance(value, list) else str(value)
+
+def describe_sla(cache, sla_id):
+    data = cache.data(sla_id)
+    if not data:
+        return ""
+    loss, latency, jitter = _val(data.get("loss")), _val(data.get("latency")), _val(data.get("jitter"))
+    probe = _ref(data.get("appProbeClass", {}))
+    text = f"{loss or '-'}% / {latency or '-'}ms / {jitter or '-'}ms"
+    return f"{text} (probe {cache.name(probe)})" if probe else text
+
+def describe_color_group(cache, group_id):
+    data = cache.data(group_id)
+    prefs = []
+    for level in ("primaryPreference", "secondaryPreference", "tertiaryPreference"):
+        pref = data.get(level, {})
+        colors = _val(pref.get("colorPreference", {}))
+        if colors:
+            prefs.append(f"{level[:-10]}: {_join(colors)}")
+    name = cache.name(group_id)
+    return f"{name} ({'; '.join(prefs)})" if prefs else name
+
+def flatten_traffic_policy(cache, profile_name, parcel):
+    """One row per sequence of a traffic-policy parcel, with references resolved."""
+    payload = parcel.get("payload", {})
+    data = payload.get("data", {})
+    target = data.get("target", {})
+    target_str = f"VPN {_join(_val(target.get('vpn', {})))} {_val(target.get('direction', {}))}".strip()
+    rows = []
+
+    for seq in data.get("sequences", []):
+        apps, other_match = [], []
+        for entry in seq.get("match", {}).get("entries", []):
+            for field, value in entry.items():
+                ref = _ref(value) if isinstance(value, dict) else ""
+                if field == "appList" and ref:
+                    app_names = [_val(e.get("app", e.get("appFamily", {})))
+                                 for e in cache.data(ref).get("entries", [])]
+                    apps.append(f"{cache.name(ref)} [{_join([a for a in app_names if a])}]")
+                elif ref:
+                    other_match.append(f"{field}={cache.name(ref)}")
+                elif isinstance(value, dict) and "refId" not in value:
+                    inner = value.get("value")
+                    if inner is None:
+                        # nested like sourceDataPrefix: {sourceDataPrefixList: {refId}}
+                        nested = [f"{k}={cache.name(_ref(v))}" for k, v in value.items()
+                                  if isinstance(v, dict) and _ref(v)]
+                        other_match.extend(nested or [f"{field}={json.dumps(value)}"])
+                    else:
+                        other_match.append(f"{field}={_join(inner)}")
+
+        sla_name = sla_desc = color = strict = fallback = ""
+        other_actions = []
+        for action in seq.get("actions", []):
+            act_type = _val(action.get("type", {}))
+            params = action.get("parameter", [])
+            params = params if isinstance(params, list) else [params]
+            for param in params:
+                if not isinstance(param, dict):
+                    continue
+                sla = param.get("slaClass", param if act_type == "slaClass" else {})
+                if act_type == "slaClass" or "slaClass" in param:
+                    sla_id = _ref(sla.get("slaName", {}))
+                    sla_name = cache.name(sla_id) if sla_id else sla_name
+                    sla_desc = describe_sla(cache, sla_id) if sla_id else sla_desc
+                    if _val(sla.get("preferredColor", {})):
+                        color = _join(_val(sla.get("preferredColor", {})))
+                    if _ref(sla.get("preferredColorGroup", {})):
+                        color = describe_color_group(cache, _ref(sla["preferredColorGroup"]))
+                    strict = _val(sla.get("strict", {}), strict)
+                    fallback = _val(sla.get("fallbackToBestPath", {}), fallback)
+                    continue
+                for key, value in param.items():
+                    if key == "preferredColorGroup" and _ref(value):
+                        color = describe_color_group(cache, _ref(value))
+                    elif isinstance(value, dict) and _ref(value):
+                        other_actions.append(f"{act_type}:{key}={cache.name(_ref(value))}")
+                    else:
+                        other_actions.append(f"{act_type}:{key}={_join(_val(value, value))}")
+            if not params and act_type:
+                other_actions.append(act_type)
+
+        rows.append([
+            profile_name,
+            payload.get("name", ""),
+            target_str,
+            _val(seq.get("sequenceId", {})),
+            _val(seq.get("sequenceName", {})),
+            _val(seq.get("baseAction", {})),
+            "; ".join(apps) or "-",
+            "; ".join(other_match) or "-",
+            sla_name or "-",
+            sla_desc or "-",
+            color or "-",
+            strict if strict != "" else "-",
+            fallback if fallback != "" else "-",
+            "; ".join(other_actions) or "-",
+        ])
+    return rows
+
+def build_aar_report(vm, policies, max_workers=None):
+    """Fetch all profiles concurrently and flatten every traffic-policy sequence."""
+    paths = {f"/v1/feature-profile/sdwan/application-priority/{p.get('profileId', '')}": p
+             for p in policies if p.get("profileId")}
+    details = vm.get_many(paths, max_workers=max_workers)
+    cache = ObjectCache(vm, types=AAR_OBJECT_TYPES)
+
+    rows, errors = [], []
+    for path, policy in paths.items():
+        detail = details[path]
+        name = policy.get("profileName", "")
+        if isinstance(detail, Exception):
+            errors.append([name, str(detail)])
+            continue
+        stack = list(detail.get("associatedProfileParcels", []))
+        while stack:
+            parcel = stack.pop(0)
+            stack.extend(parcel.get("subparcels", []))
+            if parcel.get("payload", {}).get("data", {}).get("sequences") is not None:
+                rows.extend(flatten_traffic_policy(cache, name, parcel))
+    return rows, errors
 
+def report(vm, csv_path=None):
+    """Print the flattened AAR rule table for all application-priority profiles."""
+    try:
+        policies = list_aar_policies(vm)
+    except Exception as e:
+        print(f"Error fetching AAR policies: {e}")
+        sys.exit(1)
+
+    rows, errors = build_aar_report(vm, policies)
+    print(f"\n=== AAR Rules ({len(policies)} profiles, {len(rows)} sequences) ===")
+    print(tabulate.tabulate(rows, headers=REPORT_HEADERS, tablefmt="fancy_grid"))
+    if errors:
+        print("\n=== Profiles that could not be fetched ===")
+        print(tabulate.tabulate(errors, headers=["Profile", "Error"], tablefmt="fancy_grid"))
+
+    if csv_path:
+        with open(csv_path, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(REPORT_HEADERS)
+            writer.writerows(rows)
+        print(f"Saved table to {csv_path}")
+
+def run(vm):
+    """Pick an application-priority policy and show its parcels."""
     try:
         policies = list_aar_policies(vm)
     except Exception as e:
@@ -118,5 +269,24 @@ def main():
     selected_policy = pick_aar_policy(policies)
     expand_aar_policy(vm, selected_policy)
 
+def main():
+    parser = argparse.ArgumentParser(description="Show application-priority (AAR) policies.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--report", action="store_true",
+                        help="flattened rule table for all profiles with SLA classes, app lists and colors resolved")
+    parser.add_argument("--csv", metavar="FILE", help="with --report, also write the table to CSV")
+    args = parser.parse_args()
+
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+
+    vm = VManage(host, user, pwd)
+    if args.report:
+        report(vm, args.csv)
+    else:
+        run(vm)
+
 if __name__ == "__main__":
     main()
@@ -1,5 +1,6 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
+from picker import Picker
 import sys
 import tabulate
 import json
@@ -15,16 +16,14 @@ def list_policy_object_profiles(vm):
         raise ValueError(f"Unexpected format: {json.dumps(resp, indent=2)}")
     return profiles
 
-def build_prefix_menu(vm, profiles):
-    """Loop through all profiles and retrieve their security-data-ip-prefix entries."""
-    menu_items = []
-    counter = 1
-
-    for p in profiles:
-        profile_id = p.get("profileId", "")
-        url = f"/v1/feature-profile/sdwan/policy-object/{profile_id}/security-data-ip-prefix"
-        resp = vm.get(url)
-
+def iter_prefix_menu(vm, profiles):
+    """Yield the security-data-ip-prefix menu items one profile at a time, in
+    profile order, while the per-profile requests run concurrently."""
+    paths = {f"/v1/feature-profile/sdwan/policy-object/{p.get('profileId', '')}/security-data-ip-prefix":
+             p.get("profileId", "") for p in profiles}
+    for path, resp in vm.iter_many(paths, ordered=True):
+        if isinstance(resp, Exception):
+            raise resp
         # Data can be dict with "data" or a list
         if isinstance(resp, dict) and "data" in resp:
             prefixes = resp["data"]
@@ -33,41 +32,36 @@ def build_prefix_menu(vm, profiles):
         else:
             prefixes = []
 
+        batch = []
         for prefix in prefixes:
             payload = prefix.get("payload", {})
-            prefix_name = payload.get("name", "")
-            menu_items.append({
-                "number": counter,
-                "prefix_name": prefix_name,
+            batch.append({
+                "prefix_name": payload.get("name", ""),
+                "profile_id": paths[path],
                 "parcel_id": prefix.get("parcelId", ""),
                 "parcel_type": prefix.get("parcelType", ""),
                 "created_by": prefix.get("createdBy", ""),
                 "full_entry": prefix
             })
-            counter += 1
+        yield batch
 
+def build_prefix_menu(vm, profiles):
+    """Loop through all profiles and retrieve their security-data-ip-prefix entries."""
+    menu_items = [item for batch in iter_prefix_menu(vm, profiles) for item in batch]
+    for number, item in enumerate(menu_items, start=1):
+        item["number"] = number
     return menu_items
 
-def pick_prefix(menu_items):
-    """Show the prefixes as a numbered table and let user select one."""
-    headers = ["#", "Prefix Object Name", "Parcel ID", "Parcel Type", "Created By"]
-    table = [
-        [item["number"], item["prefix_name"], item["parcel_id"], item["parcel_type"], item["created_by"]]
-        for item in menu_items
-    ]
-
-    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+def prefix_picker(vm, profiles):
+    """Searchable menu of all prefix objects, filled in the background."""
+    picker = Picker(["Prefix Object Name", "Parcel ID", "Parcel Type", "Created By"],
+                    row=lambda i: [i["prefix_name"], i["parcel_id"], i["parcel_type"], i["created_by"]],
+                    name=lambda i: i["prefix_name"], ident=lambda i: i["parcel_id"], noun="prefix objects")
+    return picker.load(iter_prefix_menu(vm, profiles))
 
-    while True:
-        choice = input("Select a number to view prefix details (or 'q' to quit): ").strip()
-        if choice.lower() == "q":
-            sys.exit(0)
-        if choice.isdigit():
-            choice_num = int(choice)
-            selected = next((i for i in menu_items if i["number"] == choice_num), None)
-            if selected:
-                return selected
-        print("Invalid selection, try again.")
+def pick_prefix(picker):
+    """Let the user search and select a prefix object."""
+    return picker.pick("Select a number to view prefix details")
 
 def show_prefix_details(selected):
     """Display the list of prefixes from the payload in a clean table."""
@@ -87,27 +81,33 @@ def show_prefix_details(selected):
     else:
         print("\nNo entries found for this prefix object.")
 
-def main():
-    if len(sys.argv) >= 4:
-        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
-    else:
-        host, user, pwd = load_vmanage_creds()
-
-    vm = VManage(host, user, pwd)
-
+def run(vm):
+    """Pick a security-data-ip-prefix object and show its entries."""
     try:
         profiles = list_policy_object_profiles(vm)
     except Exception as e:
         print(f"Error fetching profiles: {e}")
         sys.exit(1)
 
-    menu_items = build_prefix_menu(vm, profiles)
-    if not menu_items:
+    try:
+        selected_prefix = pick_prefix(prefix_picker(vm, profiles))
+    except Exception as e:
+        print(f"Error fetching prefix objects: {e}")
+        sys.exit(1)
+    if not selected_prefix:
         print("No security-data-ip-prefix entries found.")
         sys.exit(0)
 
-    selected_prefix = pick_prefix(menu_items)
     show_prefix_details(selected_prefix)
 
+def main():
+    if len(sys.argv) >= 4:
+        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+
+    vm = VManage(host, user, pwd)
+    run(vm)
+
 if __name__ == "__main__":
     main()
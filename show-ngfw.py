@@ -1,6 +1,11 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
+from object_index import ObjectCache, ObjectIndex
+from ngfw_analyzer import NGFW_OBJECT_TYPES, analyze_parcels
+from picker import Picker
+import argparse
 import sys
+import threading
 import tabulate
 import json
 from datetime import datetime
@@ -26,31 +31,39 @@ def list_policies(vm):
     return profiles
 
 def pick_policy(profiles):
-    headers = ["#", "Policy ID", "Name", "Description", "Last Updated By", "Last Updated"]
-    table = []
-    for idx, p in enumerate(profiles, start=1):
-        table.append([
-            idx,
-            p.get("profileId", ""),
-            p.get("profileName", ""),
-            p.get("description", ""),
-            p.get("lastUpdatedBy", ""),
-            ms_to_date(p.get("lastUpdatedOn", ""))
-        ])
-    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
-
-    while True:
-        choice = input("Select a policy number to view NGFW details (or 'q' to quit): ").strip()
-        if choice.lower() == "q":
-            sys.exit(0)
-        if choice.isdigit():
-            choice = int(choice)
-            if 1 <= choice <= len(profiles):
-                return profiles[choice - 1].get("profileId", "")
-        print("Invalid selection, try again.")
+    picker = Picker(["Policy ID", "Name", "Description", "Last Updated By", "Last Updated"],
+                    row=lambda p: [p.get("profileId", ""), p.get("profileName", ""), p.get("description", ""),
+                                   p.get("lastUpdatedBy", ""), ms_to_date(p.get("lastUpdatedOn", ""))],
+                    name=lambda p: p.get("profileName", ""), ident=lambda p: p.get("profileId", ""),
+                    noun="policies")
+    picker.add(profiles)
+    selected = picker.pick("Select a policy number to view NGFW details")
+    if not selected:
+        print("No embedded-security policies found.")
+        sys.exit(0)
+    return selected.get("profileId", "")
+
+_object_index = None          # opened on first lookup, not at import
+_object_index_lock = threading.Lock()
+
+def local_object_index(vm):
+    """The local object index if it was recently synced from this vManage, otherwise None."""
+    global _object_index
+    with _object_index_lock:
+        if _object_index is None:
+            _object_index = ObjectIndex.open_existing() or False
+    if _object_index and not _object_index.usable_for(vm.host):
+        return _object_index
+    return None
 
 def get_friendly_name(vm, ref_id):
-    """Try to resolve a UUID to a friendly name via policy-object API."""
+    """Resolve a UUID to a friendly name, from the local object index if it is
+    usable for this vManage, otherwise via policy-object API."""
+    index = local_object_index(vm)
+    if index:
+        name = index.name_for(ref_id)
+        if name:
+            return name
     try:
         resp = vm.get(f"/v1/feature-profile/sdwan/policy-object/{ref_id}")
         if isinstance(resp, dict):
@@ -140,14 +153,55 @@ def show_ngfw_details(vm, policy_id):
             writer.writerows(rows)
         print(f"Saved table to {filename}")
 
-def main():
-    if len(sys.argv) >= 4:
-        host, user, pwd = sys.argv[1], sys.argv[2], sys.argv[3]
-    else:
-        host, user, pwd = load_vmanage_creds()
+    if input("Check rules for shadowing/redundancy? (y/n): ").strip().lower() == "y":
+        show_findings(analyze_parcels(vm, parcels))
 
-    vm = VManage(host, user, pwd)
+FINDING_HEADERS = ["Parcel Name", "Finding", "Rule", "Action", "Matched Earlier By", "Earlier Action"]
+
+def finding_row(f):
+    return [f["parcel"], f["kind"], f["rule"], f["action"], f["by"], f["by_action"]]
+
+def show_findings(findings):
+    if not findings:
+        print("No shadowed, redundant or overlapping rules found.")
+        return
+    counts = {}
+    for f in findings:
+        counts[f["kind"]] = counts.get(f["kind"], 0) + 1
+    print(f"\n=== Rule analysis: {', '.join(f'{n} {k}' for k, n in sorted(counts.items()))} ===")
+    print(tabulate.tabulate([finding_row(f) for f in findings], headers=FINDING_HEADERS, tablefmt="fancy_grid"))
+
+def audit(vm, csv_path=None):
+    """Analyze the NGFW rules of every embedded-security policy."""
+    profiles = list_policies(vm)
+    paths = {f"/v1/feature-profile/sdwan/embedded-security/{p.get('profileId', '')}/unified/ngfirewall": p
+             for p in profiles}
+    cache = ObjectCache(vm, types=NGFW_OBJECT_TYPES)
+
+    headers = ["Policy"] + FINDING_HEADERS
+    rows = []
+    for path, resp in vm.get_many(paths).items():
+        name = paths[path].get("profileName", "")
+        if isinstance(resp, Exception):
+            print(f"Skipping {name}: {resp}")
+            continue
+        parcels = resp["data"] if isinstance(resp, dict) and "data" in resp else resp
+        for f in analyze_parcels(vm, parcels if isinstance(parcels, list) else [], cache):
+            rows.append([name] + finding_row(f))
+
+    rows.sort(key=lambda r: r[:2])
+    print(f"\n=== NGFW rule audit: {len(rows)} finding(s) in {len(profiles)} policies ===")
+    if rows:
+        print(tabulate.tabulate(rows, headers=headers, tablefmt="fancy_grid"))
+    if csv_path:
+        with open(csv_path, "w", newline="") as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(headers)
+            writer.writerows(rows)
+        print(f"Saved table to {csv_path}")
 
+def run(vm):
+    """Pick an embedded-security policy and show its NGFW rules."""
     try:
         profiles = list_policies(vm)
     except Exception as e:
@@ -157,5 +211,24 @@ def main():
     policy_id = pick_policy(profiles)
     show_ngfw_details(vm, policy_id)
 
+def main():
+    parser = argparse.ArgumentParser(description="Show NGFW rules of embedded-security policies.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--audit", action="store_true",
+                        help="report shadowed, redundant and overlapping rules in every policy")
+    parser.add_argument("--csv", metavar="FILE", help="with --audit, also write the findings to CSV")
+    args = parser.parse_args()
+
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+
+    vm = VManage(host, user, pwd)
+    if args.audit:
+        audit(vm, args.csv)
+    else:
+        run(vm)
+
 if __name__ == "__main__":
     main()
@@ -0,0 +1,81 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_creds
+from object_index import ObjectIndex, INDEX_FILE
+from ref_graph import RefGraph, LEVELS
+import argparse
+import sys
+import time
+import tabulate
+
+LEVEL_TITLES = {
+    "parcel": "Referencing Parcels",
+    "profile": "Feature Profiles",
+    "policy-group": "Policy Groups",
+    "device": "Affected Devices",
+}
+
+
+def warn_incomplete(graph):
+    failed = graph.failures()
+    if failed:
+        print(f"\nWarning: the last refresh could not read {len(failed)} item(s); impact may be incomplete:")
+        for item in failed:
+            print(f"  - {item}")
+
+
+def print_impact(impact):
+    for level in LEVELS:
+        items = impact[level]
+        print(f"\n=== {LEVEL_TITLES[level]} ({len(items)}) ===")
+        if not items:
+            print("-")
+            continue
+        table = [[i["name"], i["id"], i["via"], ", ".join(i["details"]) or "-"] for i in items]
+        print(tabulate.tabulate(table, ["Name", "ID", "Via", "Details"], tablefmt="fancy_grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Show which parcels, profiles, policy groups and devices use a policy object.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--object", "-o", action="append", default=[],
+                        help="object name or parcel UUID (repeatable)")
+    parser.add_argument("--refresh", action="store_true", help="update the graph from vManage first")
+    parser.add_argument("--full", action="store_true", help="rebuild the graph from scratch")
+    parser.add_argument("--db", default=INDEX_FILE, help="index file (default: %(default)s)")
+    parser.add_argument("--workers", type=int, help="cap on concurrent fetches (default: adaptive)")
+    args = parser.parse_args()
+
+    graph = RefGraph(args.db)
+
+    if args.refresh or args.full or not graph.refreshed_at():
+        if len(args.creds) >= 3:
+            host, user, pwd = args.creds[:3]
+        else:
+            host, user, pwd = load_vmanage_creds()
+        vm = VManage(host, user, pwd)
+        try:
+            stats = graph.refresh(vm, full=args.full, max_workers=args.workers)
+        except Exception as e:
+            print(f"Error refreshing reference graph: {e}")
+            sys.exit(1)
+        print(f"Reference graph updated: {stats['profiles']} profiles, "
+              f"{stats['policy_groups']} policy groups refreshed, {stats['skipped']} unchanged, "
+              f"{stats['removed']} removed, {len(stats['failed'])} failed")
+    else:
+        print(f"Reference graph from {graph.synced_host() or 'unknown host'}, "
+              f"refreshed {time.strftime('%Y-%m-%d %H:%M', time.localtime(graph.refreshed_at()))}")
+    warn_incomplete(graph)
+
+    index = ObjectIndex.open_existing(args.db)
+    for term in args.object:
+        # resolve names through the object index, otherwise treat as a UUID
+        matches = index.by_name(term) if index else []
+        targets = [(m["parcel_id"], m["name"]) for m in matches] or [(term, term)]
+        for parcel_id, name in targets:
+            print(f"\n##### Impact of '{name}' ({parcel_id}) #####")
+            print_impact(graph.impact(parcel_id))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_creds
+from snapshot_store import SnapshotStore, SNAPSHOT_DIR, take_snapshot, diff_snapshots
+import argparse
+import json
+import sys
+import time
+import tabulate
+
+
+def short(value, width=60):
+    text = json.dumps(value) if not isinstance(value, str) else value
+    return text if len(text) <= width else text[:width - 3] + "..."
+
+
+def cmd_snapshot(store, args):
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+    vm = VManage(host, user, pwd)
+
+    started = time.time()
+    try:
+        manifest, written = take_snapshot(vm, store, name=args.name, max_workers=args.workers)
+    except Exception as e:
+        print(f"Error taking snapshot: {e}")
+        sys.exit(1)
+    total = len(manifest["items"])
+    print(f"Snapshot '{manifest['name']}': {total} items, {written} new objects, "
+          f"{total - written} unchanged ({time.time() - started:.1f}s)")
+
+
+def cmd_list(store, args):
+    headers = ["Name", "Created", "vManage", "Items"]
+    table = [[m["name"], time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(m["created"])),
+              m.get("host", ""), len(m["items"])] for m in store.list_manifests()]
+    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+
+
+def cmd_diff(store, args):
+    try:
+        changes = diff_snapshots(store, args.old, args.new)
+    except FileNotFoundError as e:
+        print(e)
+        sys.exit(1)
+
+    if args.json:
+        print(json.dumps(changes, indent=2))
+        return
+    if not changes:
+        print(f"No differences between '{args.old}' and '{args.new}'.")
+        return
+
+    headers = ["Status", "Type", "Name", "Field", "Change", "Old", "New"]
+    table = []
+    for c in changes:
+        if c["status"] != "changed":
+            table.append([c["status"], c["type"], c["name"], "-", "-", "-", "-"])
+            continue
+        for field, change, old, new in c["fields"]:
+            table.append(["changed", c["type"], c["name"], field, change,
+                          short(old) if old is not None else "-", short(new) if new is not None else "-"])
+    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+    counts = {s: sum(1 for c in changes if c["status"] == s) for s in ("added", "removed", "changed")}
+    print(f"{counts['added']} added, {counts['removed']} removed, {counts['changed']} changed")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Snapshot feature profiles and policy groups, and diff snapshots offline.")
+    parser.add_argument("--store", default=SNAPSHOT_DIR, help="snapshot directory (default: %(default)s)")
+    sub = parser.add_subparsers(dest="command")
+
+    p = sub.add_parser("snapshot", help="capture the current estate")
+    p.add_argument("creds", nargs="*", help="optional: host user password")
+    p.add_argument("--name", help="snapshot name (default: timestamp)")
+    p.add_argument("--workers", type=int, help="cap on concurrent fetches (default: adaptive)")
+    p.set_defaults(func=cmd_snapshot)
+
+    p = sub.add_parser("list", help="list stored snapshots")
+    p.set_defaults(func=cmd_list)
+
+    p = sub.add_parser("diff", help="compare two snapshots")
+    p.add_argument("old")
+    p.add_argument("new")
+    p.add_argument("--json", action="store_true", help="machine-readable output")
+    p.set_defaults(func=cmd_diff)
+
+    args = parser.parse_args()
+    if not args.command:
+        parser.print_help()
+        sys.exit(1)
+
+    args.func(SnapshotStore(args.store), args)
+
+
+if __name__ == "__main__":
+    main()
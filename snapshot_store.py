@@ -0,0 +1,200 @@
+# snapshot_store.py
+import os
+import gzip
+import json
+import time
+import hashlib
+from collections import Counter
+
+from object_index import fetch_policy_objects, _as_list
+
+SNAPSHOT_DIR = os.path.expanduser("~/scripts/cisco-sdwan/snapshots")
+
+# Feature profiles captured as profile detail + associated parcels
+DETAIL_PROFILE_TYPES = ["application-priority", "embedded-security"]
+
+# Bookkeeping fields that change without a configuration change
+VOLATILE_FIELDS = {"lastUpdatedOn", "lastUpdatedBy", "lastUpdatedOnStr", "profileParcelCount",
+                   "referenceCount", "@rid"}
+
+
+def canonical(obj):
+    """Deterministic JSON text used for hashing and comparison."""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+
+
+def _clean(node):
+    if isinstance(node, dict):
+        return {k: _clean(v) for k, v in node.items() if k not in VOLATILE_FIELDS}
+    if isinstance(node, list):
+        return [_clean(v) for v in node]
+    return node
+
+
+class SnapshotStore:
+    """Content-addressed store: each distinct object is written once as gzip JSON
+    under objects/<sha256>, and a snapshot is a manifest of key -> hash."""
+
+    def __init__(self, root=SNAPSHOT_DIR):
+        self.root = root
+        os.makedirs(os.path.join(root, "objects"), exist_ok=True)
+        os.makedirs(os.path.join(root, "manifests"), exist_ok=True)
+
+    def _object_path(self, digest):
+        return os.path.join(self.root, "objects", digest[:2], f"{digest}.json.gz")
+
+    def put_object(self, obj):
+        """Store obj if not already present; return (hash, written)."""
+        text = canonical(obj)
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            return digest, False
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with gzip.open(tmp, "wt", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+        return digest, True
+
+    def get_object(self, digest):
+        with gzip.open(self._object_path(digest), "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def save_manifest(self, name, manifest):
+        path = os.path.join(self.root, "manifests", f"{name}.json.gz")
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        return path
+
+    def load_manifest(self, name):
+        path = os.path.join(self.root, "manifests", f"{name}.json.gz")
+        if not os.path.exists(path):
+            raise FileNotFoundError(f"No snapshot named '{name}' in {self.root}")
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            return json.load(f)
+
+    def list_manifests(self):
+        names = sorted(n[:-len(".json.gz")] for n in os.listdir(os.path.join(self.root, "manifests"))
+                       if n.endswith(".json.gz"))
+        return [self.load_manifest(n) for n in names]
+
+
+def collect_estate(vm, max_workers=None):
+    """Fetch every snapshot item concurrently. Returns {key: (kind, name, object)}."""
+    items = {}
+
+    # policy objects: one list call per profile and parcel type
+    for profile_id, parcel_type, parcel in fetch_policy_objects(vm, max_workers=max_workers):
+        key = f"policy-object/{profile_id}/{parcel_type}/{parcel.get('parcelId', '')}"
+        items[key] = (parcel_type, parcel.get("payload", {}).get("name", ""), parcel)
+
+    # application-priority / embedded-security profiles with their parcels
+    lists = vm.get_many([f"/v1/feature-profile/sdwan/{t}" for t in DETAIL_PROFILE_TYPES],
+                        max_workers=max_workers)
+    detail_paths = {}
+    for t in DETAIL_PROFILE_TYPES:
+        resp = lists[f"/v1/feature-profile/sdwan/{t}"]
+        if isinstance(resp, Exception):
+            raise resp
+        for p in _as_list(resp):
+            detail_paths[f"/v1/feature-profile/sdwan/{t}/{p.get('profileId', '')}"] = t
+
+    groups = _as_list(vm.get("/v1/policy-group"))
+    group_paths = [f"/v1/policy-group/{g.get('id', '')}" for g in groups]
+
+    results = vm.get_many(list(detail_paths) + group_paths, max_workers=max_workers)
+    for path, profile_type in detail_paths.items():
+        detail = results[path]
+        if isinstance(detail, Exception):
+            raise detail
+        profile_id = path.rsplit("/", 1)[1]
+        parcels = detail.get("associatedProfileParcels", [])
+        profile = {k: v for k, v in detail.items() if k != "associatedProfileParcels"}
+        items[f"{profile_type}/{profile_id}"] = (profile_type, profile.get("profileName", ""), profile)
+
+        stack = [(f"{profile_type}/{profile_id}", p) for p in parcels]
+        while stack:
+            parent, parcel = stack.pop()
+            key = f"{parent}/{parcel.get('parcelId', '')}"
+            body = {k: v for k, v in parcel.items() if k != "subparcels"}
+            items[key] = (parcel.get("parcelType", ""), parcel.get("payload", {}).get("name", ""), body)
+            stack.extend((key, sp) for sp in parcel.get("subparcels", []))
+
+    for path in group_paths:
+        detail = results[path]
+        if isinstance(detail, Exception):
+            raise detail
+        items[f"policy-group/{path.rsplit('/', 1)[1]}"] = ("policy-group", detail.get("name", ""), detail)
+
+    return items
+
+
+def take_snapshot(vm, store, name=None, max_workers=None):
+    """Capture the estate into the store. Returns (manifest, new_object_count)."""
+    name = name or time.strftime("%Y%m%d-%H%M%S")
+    items = collect_estate(vm, max_workers=max_workers)
+
+    manifest = {"name": name, "created": time.time(), "host": vm.host, "items": {}}
+    written = 0
+    for key, (kind, label, obj) in sorted(items.items()):
+        digest, new = store.put_object(_clean(obj))
+        written += new
+        manifest["items"][key] = {"hash": digest, "type": kind, "name": label}
+    store.save_manifest(name, manifest)
+    return manifest, written
+
+
+def field_diff(old, new, path=""):
+    """Yield (path, change, old_value, new_value) for the differences between two objects.
+
+    Lists are compared as multisets so added/removed entries are reported
+    individually; same items in a different order are reported as "reordered".
+    """
+    if isinstance(old, dict) and isinstance(new, dict):
+        for k in sorted(set(old) | set(new)):
+            sub = f"{path}.{k}" if path else k
+            if k not in old:
+                yield sub, "added", None, new[k]
+            elif k not in new:
+                yield sub, "removed", old[k], None
+            elif old[k] != new[k]:
+                yield from field_diff(old[k], new[k], sub)
+    elif isinstance(old, list) and isinstance(new, list):
+        a = Counter(canonical(v) for v in old)
+        b = Counter(canonical(v) for v in new)
+        if a == b:
+            yield path, "reordered", None, None
+            return
+        for text in (a - b).elements():
+            yield f"{path}[]", "removed", json.loads(text), None
+        for text in (b - a).elements():
+            yield f"{path}[]", "added", None, json.loads(text)
+    else:
+        yield path, "changed", old, new
+
+
+def diff_snapshots(store, old_name, new_name):
+    """Compare two snapshots by hash, then field by field where hashes differ.
+
+    Returns a list of dicts: key, type, name, status (added/removed/changed) and
+    for changed items a "fields" list from field_diff().
+    """
+    old = store.load_manifest(old_name)["items"]
+    new = store.load_manifest(new_name)["items"]
+    changes = []
+    for key in sorted(set(old) | set(new)):
+        a, b = old.get(key), new.get(key)
+        if a and b and a["hash"] == b["hash"]:
+            continue
+        item = b or a
+        change = {"key": key, "type": item["type"], "name": item["name"]}
+        if not a:
+            change["status"] = "added"
+        elif not b:
+            change["status"] = "removed"
+        else:
+            change["status"] = "changed"
+            change["fields"] = list(field_diff(store.get_object(a["hash"]), store.get_object(b["hash"])))
+        changes.append(change)
+    return changes
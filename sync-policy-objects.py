@@ -0,0 +1,56 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_creds
+from object_index import ObjectIndex, INDEX_FILE
+import argparse
+import sys
+import tabulate
+
+
+def print_objects(index, objects):
+    headers = ["Object Name", "Parcel Type", "Parcel ID", "Matched", "Entries"]
+    table = []
+    for obj in objects:
+        values = [e["value"] for e in index.entries_for(obj["parcel_id"])]
+        shown = ", ".join(values[:5]) + (f" (+{len(values) - 5})" if len(values) > 5 else "")
+        table.append([obj["name"], obj["parcel_type"], obj["parcel_id"], obj.get("matched", "-"), shown])
+    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mirror all policy-object parcels into a local index and search it.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--db", default=INDEX_FILE, help="index file (default: %(default)s)")
+    parser.add_argument("--no-sync", action="store_true", help="only query the existing index")
+    parser.add_argument("--find", action="append", default=[],
+                        help="look up by name, UUID, IP/prefix or port (repeatable)")
+    parser.add_argument("--workers", type=int, help="cap on concurrent fetches (default: adaptive)")
+    args = parser.parse_args()
+
+    index = ObjectIndex(args.db)
+
+    if not args.no_sync:
+        if len(args.creds) >= 3:
+            host, user, pwd = args.creds[:3]
+        else:
+            host, user, pwd = load_vmanage_creds()
+        vm = VManage(host, user, pwd)
+
+        try:
+            count = index.sync(vm, max_workers=args.workers)
+        except Exception as e:
+            print(f"Error syncing policy objects: {e}")
+            sys.exit(1)
+        print(f"Indexed {count} policy objects into {args.db}")
+
+    for term in args.find:
+        results = index.lookup(term)
+        print(f"\n=== Results for '{term}' ===")
+        if results:
+            print_objects(index, results)
+        else:
+            print("No matching policy objects.")
+
+
+if __name__ == "__main__":
+    main()
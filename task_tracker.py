@@ -0,0 +1,209 @@
+# task_tracker.py
+import copy
+import heapq
+import time
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Task status values that mean a device action has finished
+TASK_DONE_STATES = {"success", "failure", "failed", "done", "skipped", "aborted"}
+TASK_FAILED_STATES = {"failure", "failed", "aborted"}
+
+
+class TaskResult:
+    """Final state of one vManage action task."""
+
+    def __init__(self, task_id):
+        self.task_id = task_id
+        self.status = "in_progress"
+        self.devices = {}       # device key -> {"status", "activity", ...}
+        self.polls = 0
+        self.failures = 0       # consecutive failed status polls
+        self.started = time.time()
+        self.finished = None
+        self.error = None
+        self.raw = None
+
+    @property
+    def elapsed(self):
+        return (self.finished or time.time()) - self.started
+
+    @property
+    def ok(self):
+        return self.error is None and self.status == "done" and not self.failed_devices
+
+    @property
+    def failed_devices(self):
+        return [k for k, d in self.devices.items() if d["status"].lower() in TASK_FAILED_STATES]
+
+    def as_dict(self):
+        return {
+            "task_id": self.task_id,
+            "status": self.status,
+            "ok": self.ok,
+            "elapsed": round(self.elapsed, 1),
+            "polls": self.polls,
+            "failures": self.failures,
+            "error": self.error,
+            "devices": self.devices,
+        }
+
+
+def is_task_done(status):
+    """True when a /device/action/status response shows the task has finished."""
+    summary = status.get("summary", {})
+    devices = status.get("data", [])
+    if summary.get("status", "").lower() == "done":
+        return True
+    return bool(devices) and all(d.get("status", "").lower() in TASK_DONE_STATES for d in devices)
+
+
+class TaskTracker:
+    """Poll many vManage action tasks concurrently.
+
+    Each task has its own interval: it starts at `interval`, grows by `backoff`
+    while nothing changes and drops back to `interval` as soon as any device
+    reports progress. A failed status request is treated as transient: the
+    task is polled again with the backed-off interval and only marked as an
+    error after `max_failures` consecutive failures (or the timeout).
+    Tracking a task id that another caller is already tracking does not
+    start a second poll loop. Results are dropped once every caller waiting
+    for them has received them, so tracking the same id later polls again.
+    """
+
+    def __init__(self, vm, interval=2, max_interval=30, backoff=1.5, max_workers=16, max_failures=5):
+        self.vm = vm
+        self.interval = interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.max_workers = max_workers
+        self.max_failures = max_failures
+        self.lock = threading.Lock()
+        self.results = {}      # task_id -> TaskResult, while any caller is waiting for it
+        self.waiters = {}      # task_id -> number of track() calls waiting for it
+
+    def _update(self, result, status, on_progress):
+        """Merge a status response into result; return True if anything changed."""
+        changed = False
+        for d in status.get("data", []):
+            key = d.get("host-name") or d.get("system-ip") or d.get("uuid", "")
+            activity = d.get("activity", [])
+            last = activity[-1] if isinstance(activity, list) and activity else ""
+            current = {
+                "status": d.get("status", ""),
+                "activity": last,
+                "system_ip": d.get("system-ip", ""),
+            }
+            if result.devices.get(key) != current:
+                result.devices[key] = current
+                changed = True
+                if on_progress:
+                    on_progress(result.task_id, key, current)
+        return changed
+
+    def _poll_once(self, result, on_progress):
+        """One status request; returns True if the task changed since the last poll."""
+        status = self.vm.get(f"/device/action/status/{result.task_id}")
+        result.polls += 1
+        result.raw = status
+        changed = self._update(result, status, on_progress)
+        if is_task_done(status):
+            result.status = "done"
+        return changed
+
+    def track(self, task_ids, timeout=1800, on_progress=None):
+        """Wait for all task_ids. Returns {task_id: TaskResult}.
+
+        All tasks share one scheduler: due tasks are polled in parallel on a
+        bounded pool, then rescheduled with their own interval, so hundreds of
+        tasks cost at most max_workers concurrent requests.
+        on_progress(task_id, device, state) is called whenever a device's
+        status or last activity changes.
+        """
+        started = time.time()
+        task_ids = list(dict.fromkeys(t for t in task_ids if t))
+        todo = []
+        with self.lock:
+            for task_id in task_ids:
+                if task_id not in self.results:
+                    self.results[task_id] = TaskResult(task_id)
+                    todo.append(self.results[task_id])
+                self.waiters[task_id] = self.waiters.get(task_id, 0) + 1
+            results = {t: self.results[t] for t in task_ids}
+        try:
+            self._poll(todo, timeout, on_progress)
+            return self._wait_others(results, started + timeout, timeout)
+        finally:
+            with self.lock:
+                for task_id in task_ids:
+                    self.waiters[task_id] -= 1
+                    if not self.waiters[task_id]:
+                        del self.waiters[task_id]
+                        del self.results[task_id]
+
+    def _wait_others(self, results, deadline, timeout):
+        """Wait until deadline for tasks another caller is polling. Tasks still
+        running then are returned as a "timeout" copy; the other caller keeps
+        polling the original."""
+        pending = [r for r in results.values() if r.finished is None]
+        while pending and time.time() < deadline:
+            time.sleep(min(self.interval, max(0, deadline - time.time())))
+            pending = [r for r in pending if r.finished is None]
+        for result in pending:
+            expired = copy.copy(result)
+            expired.devices = dict(result.devices)
+            expired.status = "timeout"
+            expired.error = f"still running after {timeout}s"
+            expired.finished = time.time()
+            results[result.task_id] = expired
+        return results
+
+    def _poll(self, todo, timeout, on_progress):
+        """Poll the given TaskResults until each is done, failed or timed out."""
+        if not todo:
+            return
+        by_id = {r.task_id: r for r in todo}
+
+        schedule = [(time.time(), r.task_id) for r in todo]
+        intervals = {r.task_id: self.interval for r in todo}
+        heapq.heapify(schedule)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            while schedule:
+                wait = schedule[0][0] - time.time()
+                if wait > 0:
+                    time.sleep(wait)
+
+                now = time.time()
+                due = []
+                while schedule and schedule[0][0] <= now:
+                    due.append(by_id[heapq.heappop(schedule)[1]])
+
+                futures = {r.task_id: pool.submit(self._poll_once, r, on_progress) for r in due}
+                for result in due:
+                    try:
+                        changed = futures[result.task_id].result()
+                        result.failures = 0
+                        result.error = None
+                    except Exception as e:
+                        changed = False
+                        result.failures += 1
+                        result.error = str(e)
+                        if result.failures >= self.max_failures:
+                            result.status = "error"
+                            result.error = f"{result.failures} consecutive status poll failures, last: {e}"
+                    if result.status != "in_progress":
+                        result.finished = time.time()
+                        continue
+                    if now - result.started > timeout:
+                        result.status = "timeout"
+                        result.error = f"still running after {timeout}s" + (
+                            f" (last poll failed: {result.error})" if result.failures else "")
+                        result.finished = time.time()
+                        continue
+
+                    interval = intervals[result.task_id]
+                    interval = self.interval if changed else min(interval * self.backoff, self.max_interval)
+                    intervals[result.task_id] = interval
+                    heapq.heappush(schedule, (time.time() + interval, result.task_id))
+
@@ -0,0 +1,43 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_creds
+import argparse
+import json
+import sys
+import tabulate
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Wait for vManage action tasks and show per-device results.")
+    parser.add_argument("task_ids", nargs="+", help="task / process ids to track")
+    parser.add_argument("--creds", nargs=3, metavar=("HOST", "USER", "PASSWORD"),
+                        help="use these instead of the vault file")
+    parser.add_argument("--timeout", type=int, default=1800, help="seconds to wait (default: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="print the structured result as JSON")
+    args = parser.parse_args()
+
+    if args.creds:
+        host, user, pwd = args.creds
+    else:
+        host, user, pwd = load_vmanage_creds()
+    vm = VManage(host, user, pwd)
+
+    def progress(task_id, device, state):
+        if not args.json:
+            print(f"[{task_id[:8]}] {device}: {state['status']} {state['activity']}")
+
+    results = vm.track_tasks(args.task_ids, timeout=args.timeout, on_progress=progress)
+
+    if args.json:
+        print(json.dumps({t: r.as_dict() for t, r in results.items()}, indent=2))
+    else:
+        headers = ["Task ID", "Status", "Devices", "Failed", "Polls", "Elapsed (s)", "Error"]
+        table = [[t, r.status, len(r.devices), len(r.failed_devices), r.polls, f"{r.elapsed:.0f}", r.error or "-"]
+                 for t, r in results.items()]
+        print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+
+    if not all(r.ok for r in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,13 @@
 from vmanage_api import VManage
 from creds_loader import load_vmanage_creds
+from ref_graph import RefGraph
+from object_index import INDEX_MAX_AGE
+from deploy_batch import DeployBatch, confirm_and_deploy
+from prefix_txn import TransactionError, print_transaction
+from picker import Picker
+from prefix_ingest import PrefixBatch, normalize_prefix, iter_prefix_file, write_prefix_file, to_entries
 import sys
+import time
 import tabulate
 import json
 
@@ -13,45 +20,38 @@ def list_policy_object_profiles(vm):
     else:
         raise ValueError(f"Unexpected format: {json.dumps(resp, indent=2)}")
 
-def build_prefix_menu(vm, profiles):
-    menu_items = []
-    counter = 1
-    for p in profiles:
-        profile_id = p.get("profileId", "")
-        url = f"/v1/feature-profile/sdwan/policy-object/{profile_id}/security-data-ip-prefix"
-        resp = vm.get(url)
+def iter_prefix_menu(vm, profiles):
+    paths = {f"/v1/feature-profile/sdwan/policy-object/{p.get('profileId', '')}/security-data-ip-prefix":
+             p.get("profileId", "") for p in profiles}
+    for path, resp in vm.iter_many(paths, ordered=True):
+        if isinstance(resp, Exception):
+            raise resp
         prefixes = resp["data"] if isinstance(resp, dict) and "data" in resp else resp
+        yield [{
+            "prefix_name": prefix.get("payload", {}).get("name", ""),
+            "profile_id": paths[path],
+            "parcel_id": prefix.get("parcelId", ""),
+            "parcel_type": prefix.get("parcelType", ""),
+            "created_by": prefix.get("createdBy", ""),
+            "full_entry": prefix
+        } for prefix in prefixes]
 
-        for prefix in prefixes:
-            payload = prefix.get("payload", {})
-            prefix_name = payload.get("name", "")
-            menu_items.append({
-                "number": counter,
-                "prefix_name": prefix_name,
-                "profile_id": profile_id,
-                "parcel_id": prefix.get("parcelId", ""),
-                "parcel_type": prefix.get("parcelType", ""),
-                "created_by": prefix.get("createdBy", ""),
-                "full_entry": prefix
-            })
-            counter += 1
-    return menu_items
-
-def pick_prefix(menu_items):
-    headers = ["#", "Prefix Object Name", "Parcel ID", "Created By"]
-    table = [[i["number"], i["prefix_name"], i["parcel_id"], i["created_by"]] for i in menu_items]
-    print(tabulate.tabulate(table, headers, tablefmt="fancy_grid"))
+def prefix_picker(vm, profiles):
+    picker = Picker(["Prefix Object Name", "Parcel ID", "Created By"],
+                    row=lambda i: [i["prefix_name"], i["parcel_id"], i["created_by"]],
+                    name=lambda i: i["prefix_name"], ident=lambda i: i["parcel_id"], noun="prefix objects")
+    return picker.load(iter_prefix_menu(vm, profiles))
 
-    while True:
-        choice = input("Select a number to view prefix details (or 'q' to quit): ").strip()
-        if choice.lower() == "q":
-            sys.exit(0)
-        if choice.isdigit():
-            choice_num = int(choice)
-            selected = next((i for i in menu_items if i["number"] == choice_num), None)
-            if selected:
-                return selected
-        print("Invalid selection, try again.")
+def pick_prefix(picker):
+    try:
+        selected = picker.pick("Select a number to view prefix details")
+    except Exception as e:
+        print(f"Error fetching prefix objects: {e}")
+        sys.exit(1)
+    if not selected:
+        print("No security-data-ip-prefix entries found.")
+        sys.exit(0)
+    return selected
 
 def show_prefix_details_table(prefix_object):
     payload = prefix_object.get("payload", {})
@@ -70,17 +70,33 @@ def show_prefix_details_table(prefix_object):
     else:
         print("No entries found for this prefix object.")
 
-def push_update(vm, profile_id, parcel_id, prefix_name, entries):
-    updated_payload = {
-        "name": prefix_name,
-        "data": {
-            "entries": entries
-        }
-    }
-    resp = vm.put(f"/v1/feature-profile/sdwan/policy-object/{profile_id}/security-data-ip-prefix/{parcel_id}", updated_payload)
-    return resp
-
-def add_multiple_prefixes(vm, selected):
+def show_impact(vm, selected):
+    """Print what uses this prefix object, if the reference graph has been built from this vManage."""
+    graph = RefGraph.open_existing(host=vm.host)
+    if not graph:
+        print("\n(Run show-object-impact.py --refresh to see which policies use this object.)")
+        return
+
+    impact = graph.impact(selected["parcel_id"])
+    age = time.time() - graph.refreshed_at()
+    failed = graph.failures()
+    graph.close()
+    sequences = [f"{p['name']}: {', '.join(p['details'])}" if p["details"] else p["name"]
+                 for p in impact["parcel"]]
+    print("\n=== Impact of editing this object ===")
+    print(tabulate.tabulate([
+        ["Parcels / sequences", "\n".join(sequences) or "-"],
+        ["Profiles", "\n".join(p["name"] for p in impact["profile"]) or "-"],
+        ["Policy groups", "\n".join(g["name"] for g in impact["policy-group"]) or "-"],
+        ["Devices", len(impact["device"])],
+    ], tablefmt="fancy_grid"))
+    if failed:
+        print(f"Warning: the last graph refresh could not read {len(failed)} item(s); "
+              f"this list may be incomplete (run show-object-impact.py --refresh).")
+    if age > INDEX_MAX_AGE:
+        print(f"Note: the reference graph is {age / 3600:.0f}h old (run show-object-impact.py --refresh).")
+
+def add_multiple_prefixes(vm, batch, selected):
     payload = selected.get("full_entry", {}).get("payload", {})
     prefix_name = payload.get("name", "")
     entries = payload.get("data", {}).get("entries", [])
@@ -93,6 +109,14 @@ def add_multiple_prefixes(vm, selected):
         prefix_value = input(f"New IP prefix for '{prefix_name}': ").strip()
         if not prefix_value:
             break
+        try:
+            prefix_value = normalize_prefix(prefix_value)
+        except ValueError as e:
+            print(f"Invalid prefix ({e}), try again.")
+            continue
+        if prefix_value in {e["ipPrefix"]["value"] for e in entries + new_prefixes}:
+            print(f"{prefix_value} is already in '{prefix_name}', skipped.")
+            continue
         option_type = input("Option type (default 'global'): ").strip() or "global"
         new_prefixes.append({"ipPrefix": {"optionType": option_type, "value": prefix_value}})
 
@@ -100,58 +124,174 @@ def add_multiple_prefixes(vm, selected):
         print("No new prefixes entered. Aborting.")
         return
 
-    entries.extend(new_prefixes)
     print("\nUpdated entries will be:")
-    print(tabulate.tabulate([(e["ipPrefix"]["value"], e["ipPrefix"]["optionType"]) for e in entries],
+    print(tabulate.tabulate([(e["ipPrefix"]["value"], e["ipPrefix"]["optionType"]) for e in entries + new_prefixes],
                             headers=["IP Prefix", "Option Type"], tablefmt="fancy_grid"))
 
     if input("Confirm push to vManage? (y/n): ").strip().lower() != "y":
         print("Aborted.")
         return
 
-    resp = push_update(vm, profile_id, parcel_id, prefix_name, entries)
-    print("\nPush result:")
-    print(json.dumps(resp, indent=2))
+    batch.stage(profile_id, parcel_id, prefix_name, entries + new_prefixes)
+    try:
+        print_transaction(batch.push())
+    except TransactionError as e:
+        print_transaction(e.result)
+        return
+    entries.extend(new_prefixes)
     updated_obj = vm.get(f"/v1/feature-profile/sdwan/policy-object/{profile_id}/security-data-ip-prefix/{parcel_id}")
     show_prefix_details_table(updated_obj)
 
-def delete_prefixes(vm, selected):
+PREVIEW_LIMIT = 50
+
+def read_prefixes(path):
+    """Stream and validate a prefix file; returns the set of normalised prefixes."""
+    try:
+        parsed = PrefixBatch.parse(iter_prefix_file(path)).unique()
+    except OSError as e:
+        print(f"Cannot read {path}: {e}")
+        return None
+    except (ValueError, AttributeError, TypeError) as e:
+        # malformed JSON/CSV, wrong JSON shape or undecodable bytes
+        print(f"Cannot parse {path}: {e}")
+        return None
+    if parsed.errors:
+        print(f"\nSkipped {len(parsed.errors)} invalid line(s) in {path}:")
+        print(tabulate.tabulate(parsed.errors[:PREVIEW_LIMIT], headers=["Line", "Input", "Reason"],
+                                tablefmt="fancy_grid"))
+    return set(parsed.prefixes())
+
+def show_delta(prefix_name, added, removed, kept):
+    print(f"\n=== Changes to '{prefix_name}': +{len(added)} / -{len(removed)} / {kept} unchanged ===")
+    rows = [("+", p) for p in sorted(added)] + [("-", p) for p in sorted(removed)]
+    if rows:
+        print(tabulate.tabulate(rows[:PREVIEW_LIMIT], headers=["", "IP Prefix"], tablefmt="fancy_grid"))
+        if len(rows) > PREVIEW_LIMIT:
+            print(f"... and {len(rows) - PREVIEW_LIMIT} more")
+
+def apply_prefix_file(vm, batch, selected, mode):
+    """Add ("add"), remove ("remove") or replace with ("replace") the prefixes in a file.
+
+    The delta against the current entries is previewed and pushed in one PUT.
+    """
     payload = selected.get("full_entry", {}).get("payload", {})
     prefix_name = payload.get("name", "")
     entries = payload.get("data", {}).get("entries", [])
     profile_id = selected["profile_id"]
     parcel_id = selected["parcel_id"]
 
-    show_prefix_details_table(selected["full_entry"])
+    path = input("File (.txt/.csv/.json): ").strip()
+    if not path:
+        print("No file given. Aborting.")
+        return
+    wanted = read_prefixes(path)
+    if wanted is None:
+        return
+
+    def norm(value):
+        try:
+            return normalize_prefix(value)
+        except ValueError:
+            return value
+
+    current_set = {norm(e["ipPrefix"]["value"]) for e in entries}
+    if mode == "add":
+        added, removed = wanted - current_set, set()
+    elif mode == "remove":
+        added, removed = set(), wanted & current_set
+    else:
+        added, removed = wanted - current_set, current_set - wanted
+
+    show_delta(prefix_name, added, removed, len(current_set - removed))
+    if not added and not removed:
+        print("Nothing to change.")
+        return
 
-    del_indexes = input("\nEnter prefix numbers to delete (comma-separated): ").strip()
-    if not del_indexes:
-        print("No prefixes selected for deletion. Aborting.")
+    if input("Confirm push to vManage? (y/n): ").strip().lower() != "y":
+        print("Aborted.")
         return
 
+    new_entries = [e for e in entries if norm(e["ipPrefix"]["value"]) not in removed] + to_entries(sorted(added))
+    batch.stage(profile_id, parcel_id, prefix_name, new_entries)
     try:
-        indexes_to_delete = sorted(set(int(i.strip()) for i in del_indexes.split(",")), reverse=True)
-    except ValueError:
-        print("Invalid input. Aborting.")
+        print_transaction(batch.push())
+    except TransactionError as e:
+        print_transaction(e.result)
         return
+    entries[:] = new_entries
+    print(f"'{prefix_name}' now has {len(entries)} entries.")
 
-    for idx in indexes_to_delete:
-        if 1 <= idx <= len(entries):
-            del entries[idx - 1]
+def export_prefixes(selected):
+    payload = selected.get("full_entry", {}).get("payload", {})
+    prefix_name = payload.get("name", "")
+    entries = payload.get("data", {}).get("entries", [])
 
-    print("\nUpdated entries will be:")
-    print(tabulate.tabulate([(e["ipPrefix"]["value"], e["ipPrefix"]["optionType"]) for e in entries],
-                            headers=["IP Prefix", "Option Type"], tablefmt="fancy_grid"))
+    path = input(f"Export file (default '{prefix_name}.csv'; .txt/.csv/.json): ").strip() or f"{prefix_name}.csv"
+    try:
+        write_prefix_file(path, entries)
+    except OSError as e:
+        print(f"Cannot write {path}: {e}")
+        return
+    print(f"Saved {len(entries)} entries to {path}")
 
-    if input("Confirm deletion push to vManage? (y/n): ").strip().lower() != "y":
-        print("Aborted.")
+def report_undeployed(batch):
+    if batch.changed:
+        print(f"\n{len(batch.changed)} pushed object(s) have not been deployed: "
+              f"{', '.join(sorted(batch.changed.values()))} (saved in vManage, policy groups still need a deploy)")
+
+def offer_deploy(batch):
+    if not batch.changed:
         return
+    print(f"\n{len(batch.changed)} pushed object(s) have not been deployed yet.")
+    try:
+        # edits to several objects are deployed together, once per policy group
+        confirm_and_deploy(batch)
+    except (KeyboardInterrupt, EOFError):
+        report_undeployed(batch)
 
-    resp = push_update(vm, profile_id, parcel_id, prefix_name, entries)
-    print("\nPush result:")
-    print(json.dumps(resp, indent=2))
-    updated_obj = vm.get(f"/v1/feature-profile/sdwan/policy-object/{profile_id}/security-data-ip-prefix/{parcel_id}")
-    show_prefix_details_table(updated_obj)
+def run(vm):
+    """Interactively add/import/delete/export prefixes on security-data-ip-prefix objects."""
+    batch = DeployBatch(vm)
+    picker = prefix_picker(vm, list_policy_object_profiles(vm))
+    selected_prefix = pick_prefix(picker)
+    show_prefix_details_table(selected_prefix["full_entry"])
+    show_impact(vm, selected_prefix)
+
+    try:
+        while True:
+            action = input("\nOptions: [a] Add prefixes, [i] Import (add) from file, [d] Delete prefixes listed in file,\n"
+                           "         [r] Replace with file, [e] Export to file, [s] Switch object,\n"
+                           "         [p] Deploy pushed changes, [q] Quit: ").strip().lower()
+            if action == "q":
+                break
+            elif action == "a":
+                add_multiple_prefixes(vm, batch, selected_prefix)
+            elif action == "i":
+                apply_prefix_file(vm, batch, selected_prefix, "add")
+            elif action == "d":
+                apply_prefix_file(vm, batch, selected_prefix, "remove")
+            elif action == "r":
+                apply_prefix_file(vm, batch, selected_prefix, "replace")
+            elif action == "e":
+                export_prefixes(selected_prefix)
+            elif action == "s":
+                selected_prefix = pick_prefix(picker)
+                show_prefix_details_table(selected_prefix["full_entry"])
+                show_impact(vm, selected_prefix)
+            elif action == "p":
+                confirm_and_deploy(batch)
+            else:
+                print("Invalid option, try again.")
+    except (KeyboardInterrupt, EOFError):
+        # the user is leaving: report what is still pending, but don't prompt again
+        report_undeployed(batch)
+        sys.exit(130)
+    except BaseException:
+        # 'q' in the picker or an error: pushed edits must not be left undeployed silently
+        offer_deploy(batch)
+        raise
+    offer_deploy(batch)
+    sys.exit(0)
 
 def main():
     if len(sys.argv) >= 4:
@@ -160,21 +300,7 @@ def main():
         host, user, pwd = load_vmanage_creds()
 
     vm = VManage(host, user, pwd)
-    profiles = list_policy_object_profiles(vm)
-    menu_items = build_prefix_menu(vm, profiles)
-    selected_prefix = pick_prefix(menu_items)
-    show_prefix_details_table(selected_prefix["full_entry"])
-
-    while True:
-        action = input("\nOptions: [a] Add prefixes, [d] Delete prefixes, [q] Quit: ").strip().lower()
-        if action == "q":
-            sys.exit(0)
-        elif action == "a":
-            add_multiple_prefixes(vm, selected_prefix)
-        elif action == "d":
-            delete_prefixes(vm, selected_prefix)
-        else:
-            print("Invalid option, try again.")
+    run(vm)
 
 if __name__ == "__main__":
     main()
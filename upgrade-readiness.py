@@ -0,0 +1,69 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_creds
+from upgrade_plan import build_plan
+import argparse
+import json
+import tabulate
+
+LIST_LIMIT = 50
+
+
+def print_plan(plan):
+    s = plan["summary"]
+    print(f"\n=== Version drift (target {plan['target_version']}) ===")
+    rows = [[v, n, f"{100 * n / s['devices']:.1f}%", "target" if v == plan["target_version"] else ""]
+            for v, n in plan["drift"].items()]
+    print(tabulate.tabulate(rows, headers=["Version", "Devices", "Share", ""], tablefmt="fancy_grid"))
+
+    print(f"\n{s['devices']} devices: {s['current']} on target, {s['ready']} ready, {s['blocked']} blocked "
+          f"({s['checked']} checked in {s['check_seconds']}s)")
+
+    if plan["blocked"]:
+        print(f"\n=== Blocked ({len(plan['blocked'])}) ===")
+        rows = [[i["host_name"], i["system_ip"], i["site_id"], i["model"], i["version"], "; ".join(i["reasons"])]
+                for i in plan["blocked"][:LIST_LIMIT]]
+        print(tabulate.tabulate(rows, headers=["Host-Name", "System IP", "Site ID", "Model", "Version", "Reasons"],
+                                tablefmt="fancy_grid"))
+        if len(plan["blocked"]) > LIST_LIMIT:
+            print(f"... and {len(plan['blocked']) - LIST_LIMIT} more (see --json)")
+
+    print("\n=== Upgrade waves ===")
+    rows = [[w["wave"], w["name"], len(w["devices"]), w["sites"],
+             ", ".join(f"{m} ({n})" for m, n in sorted(w["models"].items()))] for w in plan["waves"]]
+    print(tabulate.tabulate(rows, headers=["Wave", "Round", "Devices", "Sites", "Models"], tablefmt="fancy_grid"))
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Version drift and upgrade readiness per device, with a wave plan by site and model.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--target", help="target version (default: newest version in the fleet)")
+    parser.add_argument("--min-uptime", type=float, default=24,
+                        help="hours a device must have been up to be ready (default: %(default)s)")
+    parser.add_argument("--wave-size", type=int, default=50, help="max devices per wave (default: %(default)s)")
+    parser.add_argument("--include-controllers", action="store_true", help="also plan vSmart/vBond/vManage")
+    parser.add_argument("--workers", type=int, help="cap on concurrent per-device queries (default: adaptive)")
+    parser.add_argument("--json", metavar="FILE", help="write the full plan as JSON ('-' for stdout)")
+    args = parser.parse_args()
+
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+    vm = VManage(host, user, pwd)
+
+    plan = build_plan(vm, target=args.target, min_uptime=args.min_uptime, wave_size=args.wave_size,
+                      include_controllers=args.include_controllers, max_workers=args.workers)
+
+    if args.json == "-":
+        print(json.dumps(plan, indent=2))
+        return
+    print_plan(plan)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(plan, f, indent=2)
+        print(f"\nSaved plan to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# upgrade_plan.py
+import time
+from collections import Counter
+
+from inventory_stats import device_items, is_reachable
+
+CONTROL_PATH = "/device/control/connections?deviceId={system_ip}"
+STATUS_PATH = "/device/system/status?deviceId={system_ip}"
+
+# Control peers an edge needs before an upgrade: policy from vSmart, image from vManage
+REQUIRED_PEERS = ("vsmart", "vmanage")
+
+CONTROLLER_TYPES = {"vsmart", "vbond", "vmanage"}
+
+
+def _data(resp):
+    if isinstance(resp, dict):
+        return resp.get("data", [])
+    return resp if isinstance(resp, list) else []
+
+
+def _version_key(version):
+    """Sort key for versions like 17.9.4a / 20.12.1: numeric parts compare as numbers."""
+    key = []
+    for part in str(version).replace("-", ".").split("."):
+        digits = "".join(c for c in part if c.isdigit())
+        key.append((int(digits) if digits else -1, part))
+    return key
+
+
+def _uptime_hours(value):
+    """Hours since boot from an epoch-ms boot time, or None."""
+    try:
+        return (time.time() - int(value) / 1000) / 3600
+    except (TypeError, ValueError):
+        return None
+
+
+def fetch_device_state(vm, devices, max_workers=None):
+    """Fetch control connections and system status for each device concurrently.
+
+    Returns {system_ip: {"peers": Counter(peer_type -> up), "uptime_hours": float or None, "error": str}}.
+    """
+    paths = {}
+    for d in devices:
+        ip = d.get("system-ip", "")
+        paths[CONTROL_PATH.format(system_ip=ip)] = (ip, "control")
+        paths[STATUS_PATH.format(system_ip=ip)] = (ip, "status")
+
+    state = {d.get("system-ip", ""): {"peers": Counter(), "uptime_hours": None, "error": None} for d in devices}
+    for path, resp in vm.get_many(paths, max_workers=max_workers).items():
+        ip, kind = paths[path]
+        entry = state[ip]
+        if isinstance(resp, Exception):
+            entry["error"] = f"{kind}: {resp}"
+            continue
+        if kind == "control":
+            for conn in _data(resp):
+                if str(conn.get("state", "")).lower() == "up":
+                    entry["peers"][str(conn.get("peer-type", "")).lower()] += 1
+        else:
+            status = _data(resp)
+            status = status[0] if status else {}
+            entry["uptime_hours"] = _uptime_hours(status.get("uptime-date"))
+    return state
+
+
+def _device_info(d):
+    return {"host_name": d.get("host-name", ""), "system_ip": d.get("system-ip", ""),
+            "uuid": d.get("uuid", ""), "site_id": str(d.get("site-id", "")),
+            "model": d.get("device-model", ""), "version": str(d.get("version", ""))}
+
+
+def assess(devices, state, target, min_uptime=24):
+    """Split devices into (current, ready, blocked). Blocked devices carry a "reasons" list."""
+    current, ready, blocked = [], [], []
+    for d in devices:
+        info = _device_info(d)
+        if info["version"] == target:
+            current.append(info)
+            continue
+
+        reasons = []
+        if not is_reachable(d):
+            reasons.append("unreachable")
+        s = state.get(info["system_ip"])
+        if s is None:
+            # unreachable devices are not queried; "unreachable" already blocks them
+            if not reasons:
+                reasons.append("not checked")
+        else:
+            if s["error"]:
+                reasons.append(s["error"])
+            missing = [p for p in REQUIRED_PEERS if not s["peers"].get(p)]
+            if missing and not s["error"]:
+                reasons.append("no control connection to " + "/".join(missing))
+            uptime = s["uptime_hours"]
+            if uptime is None:
+                # fall back to the boot time in the inventory record
+                uptime = _uptime_hours(d.get("uptime-date"))
+            info["uptime_hours"] = round(uptime, 1) if uptime is not None else None
+            if uptime is not None and uptime < min_uptime:
+                reasons.append(f"up only {uptime:.1f}h (< {min_uptime}h)")
+        if reasons:
+            info["reasons"] = reasons
+            blocked.append(info)
+        else:
+            ready.append(info)
+    return current, ready, blocked
+
+
+def plan_waves(ready, wave_size=50):
+    """Bucket ready devices into upgrade waves.
+
+    Wave 1 is a canary with one device per model. The rest are split into
+    rounds by position within their site (first device of every site, then
+    the second, ...) so redundant edges at a site are never upgraded
+    together; each round is ordered by model and site and cut into waves of
+    at most wave_size devices.
+    """
+    by_site = {}
+    for info in sorted(ready, key=lambda i: (i["site_id"], i["host_name"])):
+        by_site.setdefault(info["site_id"], []).append(info)
+
+    # canary: per model, a device from the smallest site that has one
+    canary = {}
+    for site, members in sorted(by_site.items(), key=lambda kv: (len(kv[1]), kv[0])):
+        for info in members:
+            canary.setdefault(info["model"], info)
+    canary_ids = {i["system_ip"] for i in canary.values()}
+
+    rounds = []
+    for members in by_site.values():
+        rest = [i for i in members if i["system_ip"] not in canary_ids]
+        for n, info in enumerate(rest):
+            if n == len(rounds):
+                rounds.append([])
+            rounds[n].append(info)
+
+    waves = []
+    if canary:
+        waves.append({"name": "canary", "devices": sorted(canary.values(), key=lambda i: i["model"])})
+    for n, members in enumerate(rounds, start=1):
+        members.sort(key=lambda i: (i["model"], i["site_id"], i["host_name"]))
+        for start in range(0, len(members), wave_size):
+            waves.append({"name": f"round {n}", "devices": members[start:start + wave_size]})
+
+    for number, wave in enumerate(waves, start=1):
+        wave["wave"] = number
+        wave["sites"] = len({i["site_id"] for i in wave["devices"]})
+        wave["models"] = dict(Counter(i["model"] for i in wave["devices"]))
+    return waves
+
+
+def build_plan(vm, target=None, min_uptime=24, wave_size=50, include_controllers=False, max_workers=None):
+    """Inventory, per-device checks and wave plan as one JSON-serialisable dict."""
+    devices = device_items(vm.get("/device"))
+    if not include_controllers:
+        devices = [d for d in devices if str(d.get("device-type", "")).lower() not in CONTROLLER_TYPES]
+
+    versions = Counter(str(d.get("version", "")) for d in devices)
+    if target is None:
+        target = max(versions, key=_version_key) if versions else ""
+
+    # only reachable devices that still need the upgrade are queried;
+    # unreachable ones are blocked by assess() without a real-time query
+    pending = [d for d in devices if str(d.get("version", "")) != target and is_reachable(d)]
+    started = time.time()
+    state = fetch_device_state(vm, pending, max_workers=max_workers)
+    current, ready, blocked = assess(devices, state, target, min_uptime)
+
+    return {
+        "generated": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "host": getattr(vm, "host", ""),
+        "target_version": target,
+        "min_uptime_hours": min_uptime,
+        "summary": {"devices": len(devices), "current": len(current), "ready": len(ready),
+                    "blocked": len(blocked), "checked": len(pending),
+                    "check_seconds": round(time.time() - started, 1)},
+        "drift": dict(sorted(versions.items(), key=lambda kv: _version_key(kv[0]), reverse=True)),
+        "waves": plan_waves(ready, wave_size),
+        "blocked": blocked,
+        "current": current,
+    }
@@ -0,0 +1,278 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_creds
+from commands import load_command
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from socketserver import ThreadingMixIn, UnixStreamServer
+from urllib.parse import urlparse, parse_qs
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import tabulate
+
+
+class CachedView:
+    """One report kept warm in memory and refreshed in the background."""
+
+    def __init__(self, name, loader, interval):
+        self.name = name
+        self.loader = loader
+        self.interval = interval
+        self.lock = threading.Lock()
+        self.refresh_lock = threading.RLock()   # one loader run at a time
+        self.value = None
+        self.updated = None
+        self.error = None
+        self.attempted = None   # start of the last loader run, successful or not
+
+    def refresh(self):
+        with self.refresh_lock:
+            started = self.attempted = time.time()
+            try:
+                value = self.loader()
+            except Exception as e:
+                with self.lock:
+                    self.error = str(e)
+                return False
+            with self.lock:
+                self.value = value
+                self.updated = time.time()
+                self.error = None
+        print(f"[{time.strftime('%H:%M:%S')}] refreshed {self.name} in {time.time() - started:.1f}s")
+        return True
+
+    def refresh_if_older(self, max_age):
+        """Refresh if the value is missing or older than max_age. Requests that
+        arrive while a refresh is running wait for it instead of starting their own."""
+        asked = time.time()
+        with self.refresh_lock:
+            if self.attempted is not None and self.attempted >= asked:
+                return
+            _, updated, _ = self.get()
+            if updated is None or asked - updated > max_age:
+                self.refresh()
+
+    def get(self):
+        with self.lock:
+            return self.value, self.updated, self.error
+
+    def loop(self, stop):
+        while not stop.wait(self.interval):
+            self.refresh()
+
+
+def session_expired(exc):
+    """True if a loader failed because the vManage session is no longer valid:
+    a 401/403, or the HTML login page returned where JSON was expected."""
+    response = getattr(exc, "response", None)
+    if response is not None and response.status_code in (401, 403):
+        return True
+    page = getattr(exc, "doc", "")   # JSON decode errors keep the text they failed on
+    return isinstance(page, str) and "j_security_check" in page
+
+
+class ViewService:
+    """Holds the vManage session and all cached views."""
+
+    def __init__(self, vm, interval=60, ngfw_ttl=300):
+        self.vm = vm
+        self.interval = interval
+        self.ngfw_ttl = ngfw_ttl
+        self.stop = threading.Event()
+        self.login_lock = threading.Lock()
+        self.session_gen = 0     # bumped on every re-login
+        self.views = {
+            "devices": CachedView("devices", lambda: self._call(self._collect, "get-device"), interval),
+            "control-status": CachedView(
+                "control-status", lambda: self._call(self._collect, "control-status"), interval),
+            "device-health": CachedView(
+                "device-health", lambda: self._call(self._collect, "device-health"), interval),
+            "policy-groups": CachedView(
+                "policy-groups", lambda: self._call(self._collect, "get-policy-group"), interval),
+            "prefix-objects": CachedView(
+                "prefix-objects", lambda: self._call(self._prefix_objects), interval),
+            "ngfw": CachedView("ngfw", lambda: self._call(self._ngfw_policies), interval),
+        }
+        self.ngfw_details = {}   # policy_id -> CachedView, created on first request
+        self.ngfw_lock = threading.Lock()
+
+    def _call(self, func, *args):
+        """Run a loader; if the session has expired, log in again once and retry.
+
+        Loaders that fail together share one login: only the first to get the
+        lock logs in, the others see the new session generation and just retry.
+        """
+        gen = self.session_gen
+        try:
+            return func(*args)
+        except Exception as e:
+            if not session_expired(e):
+                raise
+            with self.login_lock:
+                if self.session_gen == gen:
+                    self.vm.login()
+                    self.session_gen += 1
+            return func(*args)
+
+    def _collect(self, command):
+        headers, rows = load_command(command).collect(self.vm)
+        return {"headers": headers, "rows": rows}
+
+    def _prefix_objects(self):
+        module = load_command("show-data-prefix")
+        items = module.build_prefix_menu(self.vm, module.list_policy_object_profiles(self.vm))
+        headers = ["Prefix Object Name", "Parcel ID", "Parcel Type", "Created By", "Entries"]
+        rows = []
+        for item in items:
+            entries = item["full_entry"].get("payload", {}).get("data", {}).get("entries", [])
+            values = [e.get("ipPrefix", {}).get("value", "") for e in entries]
+            rows.append([item["prefix_name"], item["parcel_id"], item["parcel_type"],
+                         item["created_by"], ", ".join(values)])
+        return {"headers": headers, "rows": rows}
+
+    def _ngfw_policies(self):
+        module = load_command("show-ngfw")
+        headers = ["Policy ID", "Name", "Description", "Last Updated By", "Last Updated"]
+        rows = [[p.get("profileId", ""), p.get("profileName", ""), p.get("description", ""),
+                 p.get("lastUpdatedBy", ""), module.ms_to_date(p.get("lastUpdatedOn", ""))]
+                for p in module.list_policies(self.vm)]
+        return {"headers": headers, "rows": rows}
+
+    def _ngfw_table(self, policy_id):
+        module = load_command("show-ngfw")
+        resp = self.vm.get(f"/v1/feature-profile/sdwan/embedded-security/{policy_id}/unified/ngfirewall")
+        parcels = resp["data"] if isinstance(resp, dict) and "data" in resp else resp
+        headers, rows = module.parse_ngfw(self.vm, parcels if isinstance(parcels, list) else [])
+        return {"headers": headers, "rows": rows}
+
+    def ngfw_view(self, policy_id):
+        """Detail view of one policy listed in the ngfw view, or None for unknown ids."""
+        policies, _, _ = self.views["ngfw"].get()
+        if not policies or policy_id not in {row[0] for row in policies["rows"]}:
+            return None
+        with self.ngfw_lock:
+            view = self.ngfw_details.get(policy_id)
+            if view is None:
+                view = CachedView(f"ngfw/{policy_id}",
+                                  lambda: self._call(self._ngfw_table, policy_id), self.ngfw_ttl)
+                self.ngfw_details[policy_id] = view
+        view.refresh_if_older(self.ngfw_ttl)
+        return view
+
+    def start(self):
+        """Warm every view once, then refresh each in its own thread."""
+        threads = [threading.Thread(target=v.refresh) for v in self.views.values()]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        for view in self.views.values():
+            threading.Thread(target=view.loop, args=(self.stop,), daemon=True).start()
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def address_string(self):
+            # Unix sockets have no client address
+            return self.client_address[0] if self.client_address else "unix"
+
+        def log_message(self, fmt, *args):
+            sys.stderr.write(f"{self.address_string()} - {fmt % args}\n")
+
+        def _send(self, code, body, content_type="application/json"):
+            data = body.encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", f"{content_type}; charset=utf-8")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            parts = [p for p in url.path.split("/") if p]
+            fmt = parse_qs(url.query).get("format", ["json"])[0]
+
+            if not parts:
+                status = {name: {"age": round(time.time() - v.get()[1], 1) if v.get()[1] else None,
+                                 "error": v.get()[2]}
+                          for name, v in service.views.items()}
+                return self._send(200, json.dumps({"views": status}, indent=2))
+
+            if parts[0] == "ngfw" and len(parts) == 2:
+                view = service.ngfw_view(parts[1])
+                if view is None:
+                    if service.views["ngfw"].get()[0] is None:
+                        return self._send(503, json.dumps({"error": "ngfw policy list not loaded yet"}))
+                    return self._send(404, json.dumps({"error": f"unknown NGFW policy {parts[1]}"}))
+            elif parts[0] in service.views and len(parts) == 1:
+                view = service.views[parts[0]]
+            else:
+                return self._send(404, json.dumps({"error": f"unknown view {url.path}"}))
+
+            value, updated, error = view.get()
+            if value is None:
+                return self._send(503, json.dumps({"error": error or "not loaded yet"}))
+
+            if fmt == "table":
+                return self._send(200, tabulate.tabulate(value["rows"], value["headers"],
+                                                         tablefmt="fancy_grid") + "\n", "text/plain")
+            body = dict(value, age=round(time.time() - updated, 1), error=error)
+            self._send(200, json.dumps(body))
+
+    return Handler
+
+
+class ThreadingUnixHTTPServer(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        UnixStreamServer.server_bind(self)
+        self.server_name, self.server_port = "localhost", 0
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Serve cached vManage reports over local HTTP or a Unix socket.",
+        epilog="views: / (status), /devices, /control-status, /device-health, /policy-groups, "
+               "/prefix-objects, /ngfw, /ngfw/<policy-id>; add ?format=table for text output")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--port", type=int, default=8765, help="TCP port on 127.0.0.1 (default: %(default)s)")
+    parser.add_argument("--socket", help="listen on this Unix socket instead of TCP")
+    parser.add_argument("--interval", type=int, default=60, help="background refresh seconds (default: %(default)s)")
+    args = parser.parse_args()
+
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+
+    vm = VManage(host, user, pwd)
+    service = ViewService(vm, interval=args.interval)
+    print("Loading views...")
+    service.start()
+
+    handler = make_handler(service)
+    if args.socket:
+        if os.path.exists(args.socket):
+            os.unlink(args.socket)
+        server = ThreadingUnixHTTPServer(args.socket, handler)
+        print(f"Serving on unix:{args.socket}")
+    else:
+        server = ThreadingHTTPServer(("127.0.0.1", args.port), handler)
+        print(f"Serving on http://127.0.0.1:{args.port}/")
+
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        service.stop.set()
+        server.server_close()
+        if args.socket and os.path.exists(args.socket):
+            os.unlink(args.socket)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,8 +1,37 @@
 import requests
 import json
+import time
 import urllib3
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from requests.adapters import HTTPAdapter
+from task_tracker import TaskTracker
+from rate_limit import TokenBucket, AdaptiveLimiter
 urllib3.disable_warnings()
 
+POOL_SIZE = 32
+
+# Requests per second (and burst) per endpoint class
+READ_RATE, READ_BURST = 20, 40
+WRITE_RATE, WRITE_BURST = 4, 8
+
+# Retries for 429 (any method) and 503 (idempotent requests only)
+MAX_RETRIES = 4
+IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS", "PUT", "DELETE"}
+
+# Default (connect, read) timeout in seconds for every request
+REQUEST_TIMEOUT = (10, 120)
+
+
+def endpoint_key(url):
+    """Group a request URL by endpoint for latency baselines: the first four
+    path segments after /dataservice, with UUID/ID-like segments dropped."""
+    parts = [p for p in urlsplit(url).path.split("/") if p]
+    if "dataservice" in parts:
+        parts = parts[parts.index("dataservice") + 1:]
+    parts = [p for p in parts if not (len(p) > 8 and any(c.isdigit() for c in p))]
+    return "/".join(parts[:4])
+
 class VManage:
     def __init__(self, host, username, password):
         self.host = host.rstrip("/")
@@ -10,15 +39,62 @@ class VManage:
         self.password = password
         self.base_url = f"{self.host}/dataservice"   # ✅ define base_url here
         self.session = requests.Session()
+        # larger pool so concurrent get_many() calls reuse keep-alive connections
+        adapter = HTTPAdapter(pool_connections=POOL_SIZE, pool_maxsize=POOL_SIZE)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
         self.jsessionid = None
         self.token = None
+        self.timeout = REQUEST_TIMEOUT
+        self.tasks = TaskTracker(self)
+        self.configure_limits()
         self.login()
 
+    def configure_limits(self, read_rate=READ_RATE, write_rate=WRITE_RATE,
+                         read_burst=READ_BURST, write_burst=WRITE_BURST, max_concurrency=POOL_SIZE):
+        """Set the token-bucket rates (requests/s) for reads and writes and the
+        upper bound for the adaptive concurrency limit."""
+        self.buckets = {
+            "read": TokenBucket(read_rate, read_burst),
+            "write": TokenBucket(write_rate, write_burst),
+        }
+        self.concurrency = AdaptiveLimiter(maximum=max_concurrency)
+
+    def _send(self, method, url, endpoint_class=None, timeout=None, **kwargs):
+        """Send one API request through the rate limiter and concurrency controller.
+
+        GETs use the "read" bucket and other methods the "write" bucket unless
+        endpoint_class names one explicitly (e.g. POST queries that only read).
+        Every request is bounded by `timeout` (default self.timeout).
+        429 responses, and 503 responses to requests that are safe to repeat,
+        are retried after Retry-After (or an increasing delay) up to
+        MAX_RETRIES times; the last response is returned. A 503 to a POST
+        action is not retried, since it may already have been accepted.
+        """
+        endpoint_class = endpoint_class or ("read" if method == "GET" else "write")
+        bucket = self.buckets[endpoint_class]
+        retry_on = {429, 503} if method in IDEMPOTENT_METHODS or endpoint_class == "read" else {429}
+        for attempt in range(MAX_RETRIES + 1):
+            bucket.acquire()
+            self.concurrency.acquire()
+            started = time.monotonic()
+            status = None
+            try:
+                r = self.session.request(method, url, verify=False, timeout=timeout or self.timeout, **kwargs)
+                status = r.status_code
+            finally:
+                self.concurrency.release(status, time.monotonic() - started, endpoint_key(url))
+
+            if r.status_code not in retry_on or attempt == MAX_RETRIES:
+                return r
+            retry_after = r.headers.get("Retry-After", "")
+            time.sleep(float(retry_after) if retry_after.isdigit() else 2 ** attempt)
+
     def login(self):
         url = f"{self.host}/j_security_check"
         data = {"j_username": self.username, "j_password": self.password}
 
-        r = self.session.post(url, data=data, verify=False)
+        r = self.session.post(url, data=data, verify=False, timeout=self.timeout)
         if r.status_code != 200 or "JSESSIONID" not in self.session.cookies:
             raise Exception("Login failed")
 
@@ -26,36 +102,100 @@ class VManage:
 
         # XSRF token (some deployments may not have)
         token_url = f"{self.base_url}/client/token"
-        r = self.session.get(token_url, verify=False)
+        r = self.session.get(token_url, verify=False, timeout=self.timeout)
         if r.status_code == 200:
             self.token = r.text
 
-    def get(self, path):
+    def get(self, path, timeout=None):
         headers = {"Accept": "application/json"}
         if self.token:
             headers["X-XSRF-TOKEN"] = self.token
 
         url = f"{self.base_url}/{path.lstrip('/')}"
-        r = self.session.get(url, headers=headers, verify=False)
+        r = self._send("GET", url, timeout=timeout, headers=headers)
         r.raise_for_status()
         return r.json()
 
-    def put(self, endpoint, payload):
-        """Send a PUT request to vManage and return the JSON or text response."""
+    def get_many(self, paths, max_workers=None):
+        """GET several paths concurrently. Returns {path: json or Exception}.
+
+        Actual parallelism is governed by the adaptive concurrency limit;
+        max_workers only caps it.
+        """
+        return dict(self.iter_many(paths, max_workers))
+
+    def iter_many(self, paths, max_workers=None, ordered=False):
+        """Like get_many(), but yield (path, json or Exception) as each response arrives.
+
+        With ordered=True results are yielded in the order of paths instead,
+        each as soon as it and all earlier ones have completed.
+        """
+        paths = list(dict.fromkeys(paths))  # drop duplicates, keep order
+        if not paths:
+            return
+
+        workers = min(max_workers or self.concurrency.maximum, len(paths))
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(self.get, p): p for p in paths}
+            for fut in (futures if ordered else as_completed(futures)):
+                try:
+                    yield futures[fut], fut.result()
+                except Exception as e:
+                    yield futures[fut], e
+
+    def put(self, endpoint, payload, raise_errors=False, timeout=None):
+        """Send a PUT request to vManage and return the JSON or text response.
+
+        HTTP errors are printed and the error body returned unless raise_errors
+        is set, in which case requests.HTTPError is raised.
+        """
         headers = {"Content-Type": "application/json"}
         if self.token:
             headers["X-XSRF-TOKEN"] = self.token
 
         # endpoint should start with /v1/...
         url = f"{self.base_url}/{endpoint.lstrip('/')}"
-        r = self.session.put(url, json=payload, headers=headers, verify=False)
+        r = self._send("PUT", url, timeout=timeout, json=payload, headers=headers)
 
         try:
             r.raise_for_status()
         except requests.exceptions.HTTPError as err:
+            if raise_errors:
+                raise
             print(f"HTTP error: {err}")
 
         try:
             return r.json()
         except Exception:
             return r.text
+
+    def post(self, endpoint, payload, endpoint_class=None, timeout=None):
+        """Send a POST request to vManage and return the JSON or text response.
+
+        endpoint_class="read" charges query-style POSTs to the read bucket.
+        """
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if self.token:
+            headers["X-XSRF-TOKEN"] = self.token
+
+        url = f"{self.base_url}/{endpoint.lstrip('/')}"
+        r = self._send("POST", url, endpoint_class=endpoint_class, timeout=timeout, json=payload, headers=headers)
+        r.raise_for_status()
+
+        try:
+            return r.json()
+        except Exception:
+            return r.text
+
+    def track_tasks(self, task_ids, timeout=1800, on_progress=None):
+        """Wait for many action tasks concurrently. Returns {task_id: TaskResult}."""
+        return self.tasks.track(task_ids, timeout=timeout, on_progress=on_progress)
+
+    def wait_task(self, task_id, timeout=1800, on_progress=None):
+        """Wait for a single action task and return its last status response."""
+        result = self.track_tasks([task_id], timeout=timeout, on_progress=on_progress)[task_id]
+        if result.status == "timeout":
+            raise TimeoutError(f"Task {task_id} {result.error}")
+        if result.error:
+            raise Exception(f"Task {task_id}: {result.error}")
+        return result.raw
@@ -0,0 +1,76 @@
+from vmanage_api import VManage
+from creds_loader import load_vmanage_creds
+from event_stream import (CURSOR_FILE, PAGE_PATHS, Cursor, DeviceTimeline, EventStream, correlate,
+                          event_row)
+from inventory_stats import device_items
+import argparse
+import json
+import time
+
+
+def read_once(vm, kinds, cursor, lookback, timeline, as_json=False):
+    """Read every new record of the given kinds, print it and add it to the timeline."""
+    devices = device_items(vm.get("/device"))
+    count = 0
+    for kind in kinds:
+        stream = EventStream(vm, kind, cursor, lookback=lookback)
+        for rec in correlate(stream.read(), devices):
+            count += 1
+            timeline.add(rec)
+            if as_json:
+                print(json.dumps(rec, default=str))
+            else:
+                print("  ".join(str(v) for v in event_row(rec)))
+    cursor.save()
+    return count
+
+
+def print_summary(timeline, top=10):
+    if not timeline.total:
+        print("\nNo new alarms or events.")
+        return
+    severities = ", ".join(f"{s} {n}" for s, n in timeline.by_severity.most_common())
+    print(f"\n=== {timeline.total} record(s): {severities} ===")
+    for ip, n in timeline.counts.most_common(top):
+        latest = timeline.for_device(ip)[0]
+        print(f"{ip:15} {n:6}  {latest.get('device', {}).get('host-name', '')}  last: {event_row(latest)[4]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Stream new vManage alarms and events, correlated with the device inventory.")
+    parser.add_argument("creds", nargs="*", help="optional: host user password")
+    parser.add_argument("--kind", action="append", choices=list(PAGE_PATHS),
+                        help="stream to read (repeatable, default: alarms and events)")
+    parser.add_argument("--since", type=int, default=60,
+                        help="minutes to look back when there is no cursor yet (default: %(default)s)")
+    parser.add_argument("--follow", action="store_true", help="keep polling for new records")
+    parser.add_argument("--interval", type=int, default=30, help="seconds between polls with --follow (default: %(default)s)")
+    parser.add_argument("--cursor", default=CURSOR_FILE, help="cursor file (default: %(default)s)")
+    parser.add_argument("--no-cursor", action="store_true", help="ignore and do not update the cursor file")
+    parser.add_argument("--json", action="store_true", help="one JSON object per record")
+    args = parser.parse_args()
+
+    if len(args.creds) >= 3:
+        host, user, pwd = args.creds[:3]
+    else:
+        host, user, pwd = load_vmanage_creds()
+    vm = VManage(host, user, pwd)
+
+    kinds = args.kind or list(PAGE_PATHS)
+    cursor = Cursor(None if args.no_cursor else args.cursor)
+    timeline = DeviceTimeline()
+    try:
+        while True:
+            read_once(vm, kinds, cursor, args.since * 60, timeline, args.json)
+            if not args.follow:
+                break
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        pass
+    if not args.json:
+        print_summary(timeline)
+
+
+if __name__ == "__main__":
+    main()